@@ -0,0 +1,44 @@
+"""Benchmark the pat-row tokenizer (iter_pat_rows) on synthetic sections.
+
+Run from the repository root: python benchmarks/bench_pat_rows.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import build_litigation_dashboard as bld
+
+
+def benchmark_pat_rows(sizes=(1000, 10000, 40000), repeat=3):
+    """Time iter_pat_rows on synthetic single-line sections and print the
+    per-row cost at each size; roughly flat ns/row means linear scaling."""
+    linked = ('<div class="pat-row"><span class="pat-status st-is">Issued</span>'
+              '<span class="pat-doc"><a href="https://example.com/pdf/US{n}B2" target="_blank" '
+              'class="pat-link">US{n}B2</a></span><span class="pat-title">Synthetic patent {n}</span></div>')
+    prefiling = ('<div class="pat-row"><span class="pat-status st-pre">Pre-Filing</span>'
+                 '<span class="pat-doc"><span>CMU Docket {n}</span></span>'
+                 '<span class="pat-title">Synthetic pre-filing {n}</span></div>')
+    print(f"  {'rows':>8} {'chars':>11} {'best ms':>9} {'ns/row':>8}")
+    per_row = []
+    for n_rows in sizes:
+        rows = ''.join((prefiling if n % 7 == 0 else linked).format(n=10000000 + n)
+                       for n in range(n_rows))
+        text = (f'<div class="pat-section" id="pat-bench"><div class="pat-cat"><h3>Bench</h3>'
+                f'<span class="pat-cnt">{n_rows}</span></div>{rows}</div>')
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            count = sum(1 for _ in bld.iter_pat_rows(text))
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        assert count == n_rows, (count, n_rows)
+        per_row.append(best / n_rows * 1e9)
+        print(f"  {n_rows:>8,} {len(text):>11,} {best * 1000:>9.2f} {per_row[-1]:>8.0f}")
+    print(f"  ns/row spread (largest / smallest size): {per_row[-1] / per_row[0]:.2f}x")
+
+
+if __name__ == '__main__':
+    print("Benchmarking pat-row tokenizer...")
+    benchmark_pat_rows()
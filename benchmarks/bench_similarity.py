@@ -0,0 +1,45 @@
+"""Benchmark fuzzy product-name matching (ProductSimilarity) on a synthetic catalogue.
+
+Run from the repository root: python benchmarks/bench_similarity.py
+"""
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import build_litigation_dashboard as bld
+
+
+def benchmark_similarity(n_queries=3000, n_names=30000, k=5, seed=0):
+    """Time batched top-k matching of synthetic dashboard names against a
+    synthetic vendor catalogue spread over the 12 target companies."""
+    rnd = random.Random(seed)
+    words = ['vision', 'face', 'cloud', 'neural', 'engine', 'lens', 'photo', 'studio', 'edge',
+             'sense', 'kit', 'core', 'graph', 'scan', 'object', 'depth', 'avatar', 'retail',
+             'camera', 'model', 'compute', 'detect', 'segment', 'capture', 'search', 'assist']
+    cos = bld.TARGET_12
+    names = defaultdict(list)
+    for n in range(n_names):
+        names[cos[n % len(cos)]].append(f"{' '.join(rnd.sample(words, 3))} {n % 997}")
+    t0 = time.perf_counter()
+    sim = bld.ProductSimilarity(names)
+    built = time.perf_counter() - t0
+    queries = []
+    for n in range(n_queries):
+        co = cos[n % len(cos)]
+        target = rnd.choice(names[co]).split()
+        rnd.shuffle(target)
+        queries.append((co, ' '.join(target[:3])))
+    t0 = time.perf_counter()
+    results = sim.top_k_batch(queries, k=k)
+    matched = time.perf_counter() - t0
+    print(f"  {n_names:,} names indexed in {built:.2f}s; {len(results):,} queries, "
+          f"top-{k} each, in {matched:.2f}s ({matched / len(results) * 1000:.2f} ms/query)")
+
+
+if __name__ == '__main__':
+    print("Benchmarking product-name similarity...")
+    benchmark_similarity()
@@ -8,20 +8,37 @@ sources into a single litigation-focused dashboard.
 Output: litigation_dashboard.html
 """
 
-import os, re, json, html as html_mod
-from collections import defaultdict
+import os, re, sys, csv, json, math, time, argparse, html as html_mod
+import heapq, bisect, difflib, hashlib, pickle
+import cProfile, pstats, tracemalloc
+from array import array
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
+from typing import NamedTuple
 
 try:
     import openpyxl
 except ImportError:
     print("pip install openpyxl"); exit(1)
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None  # Parquet / Arrow sources need pyarrow; CSV and xlsx always work
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PATLYTICS_DIR = os.path.join(BASE_DIR, 'Patlytics')
 TECHSON_FILE = os.path.join(BASE_DIR, 'Techson', 'patents_bundledxlsx.xlsx')
 INPUT_HTML = os.path.join(BASE_DIR, 'base_dashboard.html')
 OUTPUT_HTML = os.path.join(BASE_DIR, 'index.html')
+PROFILE_FILE = os.path.join(BASE_DIR, 'build_profile.json')
+MATCH_TABLE_FILE = os.path.join(BASE_DIR, 'product_matches.json')
+MATCH_REVIEW_FILE = os.path.join(BASE_DIR, 'product_match_review.csv')
 
 # ──────────────────────────────────────────────
 # Company name normalization
@@ -30,10 +47,11 @@ COMPANY_NORM = {
     'google': 'Google', 'google (alphabet inc.)': 'Google',
     'google (alphabet)': 'Google', 'alphabet': 'Google', 'waymo': 'Google',
     'amazon': 'Amazon', 'amazon (aws)': 'Amazon',
+    'amazon web services': 'Amazon', 'aws': 'Amazon',
     'apple': 'Apple', 'apple inc.': 'Apple',
     'microsoft': 'Microsoft', 'microsoft corporation': 'Microsoft',
     'nvidia': 'NVIDIA',
-    'meta': 'Meta', 'meta (facebook)': 'Meta',
+    'meta': 'Meta', 'meta (facebook)': 'Meta', 'facebook': 'Meta',
     'meta platforms (facebook)': 'Meta',
     'meta platforms inc. (facebook)': 'Meta',
     'samsung': 'Samsung', 'samsung electronics': 'Samsung',
@@ -42,133 +60,800 @@ COMPANY_NORM = {
     'openai': 'OpenAI',
     'qualcomm': 'Qualcomm',
     'softbank': 'SoftBank/ARM', 'arm': 'SoftBank/ARM',
-    'xai': 'xAI',
+    'xai': 'xAI', 'x.ai': 'xAI',
 }
 
 TARGET_12 = ['Google', 'Amazon', 'Apple', 'Meta', 'Microsoft', 'NVIDIA',
              'Samsung', 'Tesla', 'OpenAI', 'Qualcomm', 'SoftBank/ARM', 'xAI']
 
+# Alias index: COMPANY_NORM keys and the canonical names, reduced to a
+# punctuation-free, suffix-stripped key ("Meta Platforms, Inc." → "meta").
+# Lookups try, in order: exact COMPANY_NORM key, alias key (also for the
+# text inside / outside parentheses), a leading alias followed only by
+# business-unit words ("Google Cloud", "Microsoft Research" → the parent),
+# then a difflib fuzzy match above COMPANY_FUZZY_THRESHOLD. A leading alias
+# followed by anything else is a different company ("Meta Materials",
+# "Apple Hospitality REIT", "Alphabet Energy"). Results are memoized in a
+# bounded LRU.
+CORP_SUFFIXES = {'inc', 'incorporated', 'corp', 'corporation', 'co', 'company',
+                 'ltd', 'limited', 'llc', 'plc', 'ag', 'sa', 'nv', 'gmbh',
+                 'holdings', 'group', 'platforms', 'technologies'}
+COMPANY_UNIT_WORDS = {'ai', 'cloud', 'research', 'labs', 'web', 'services', 'electronics',
+                      'semiconductor', 'mobile', 'devices', 'software', 'systems'}
+# High enough that one-letter variants of short names ("Teslar", "Teslas")
+# and re-spaced names ("Soft Bank") stay unresolved
+COMPANY_FUZZY_THRESHOLD = 0.95
+COMPANY_MEMO_SIZE = 4096
+
+
+def company_alias_key(text):
+    """Lowercase alphanumeric tokens with leading 'the' and corporate suffixes dropped."""
+    tokens = re.findall(r'[a-z0-9]+', text.lower())
+    if tokens and tokens[0] == 'the':
+        tokens = tokens[1:]
+    while tokens and tokens[-1] in CORP_SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+def _alias_variants(name):
+    """Alias keys for the name, the text outside parentheses and the text inside."""
+    outer = re.sub(r'\([^)]*\)', ' ', name)
+    inner = re.findall(r'\(([^)]*)\)', name)
+    keys = []
+    for part in [name, outer] + inner:
+        k = company_alias_key(part)
+        if k and k not in keys:
+            keys.append(k)
+    return keys
+
+
+COMPANY_ALIAS_INDEX = {}
+for _alias, _canon in list(COMPANY_NORM.items()) + [(c, c) for c in TARGET_12]:
+    COMPANY_ALIAS_INDEX.setdefault(company_alias_key(_alias), _canon)
+COMPANY_ALIAS_INDEX.pop('', None)
+COMPANY_ALIAS_KEYS = sorted(COMPANY_ALIAS_INDEX)
+
+
+@lru_cache(maxsize=COMPANY_MEMO_SIZE)
+def resolve_company(name):
+    """Resolve a company spelling → (canonical name, confidence 0–1, method).
+    Unresolved names come back stripped with confidence 0 and method 'none'."""
+    raw = name.strip()
+    hit = COMPANY_NORM.get(raw.lower())
+    if hit:
+        return hit, 1.0, 'exact'
+    variants = _alias_variants(raw)
+    for v in variants:
+        if v in COMPANY_ALIAS_INDEX:
+            return COMPANY_ALIAS_INDEX[v], 0.95, 'alias'
+    for v in variants:
+        first, *rest = v.split(' ')
+        if rest and first in COMPANY_ALIAS_INDEX and \
+                all(t in COMPANY_UNIT_WORDS or t in CORP_SUFFIXES for t in rest):
+            return COMPANY_ALIAS_INDEX[first], 0.9, 'unit'
+    best, best_ratio = None, 0.0
+    for v in variants:
+        if len(v) < 5:
+            continue
+        for cand in difflib.get_close_matches(v, COMPANY_ALIAS_KEYS, n=1,
+                                              cutoff=COMPANY_FUZZY_THRESHOLD):
+            ratio = difflib.SequenceMatcher(None, v, cand).ratio()
+            if ratio > best_ratio:
+                best, best_ratio = cand, ratio
+    if best:
+        return COMPANY_ALIAS_INDEX[best], round(best_ratio, 2), 'fuzzy'
+    return raw, 0.0, 'none'
+
+
 def norm_company(name):
     """Normalize a company name to one of the 12 targets or return as-is."""
-    key = name.strip().lower()
-    return COMPANY_NORM.get(key, name.strip())
+    return resolve_company(name)[0]
+
+# Canonical patent IDs: every source spells IDs its own way — 'US-10430922-B2'
+# (Patlytics), 'US10430922B2' (Techson, Patents page), 'WO/2025/193512A1',
+# provisional '63/831,790', 'CMU Docket 2026-113'. parse_patent_id() reduces
+# any spelling to one interned canonical key, and every join (Patlytics ×
+# Techson × portfolio, category moves, descriptions, goToPatent anchors)
+# goes through it. Keys of published documents are the compact document
+# number ('US10430922B2', 'WO2025193512A1'), so they double as HTML ids.
+class PatentId(NamedTuple):
+    key: str    # canonical, interned
+    kind: str   # us / wo / provisional / docket / other
+
+
+_PATENT_SEP_RE = re.compile(r'[\s/,.\-]+')
+_PATENT_FORMS = (
+    ('us', re.compile(r'US\d{6,11}(?:[ABEPS]\d?)?')),  # grants and pre-grant publications
+    ('wo', re.compile(r'WO\d{10}(?:[AB]\d)?')),
+    ('provisional', re.compile(r'6[0-3]\d{6}')),       # 63/831,790
+)
+_PATENT_DOCKET_RE = re.compile(r'CMU\s*DOCKET\s*(?:NO\.?|#)?\s*(.+)')
+
+
+@lru_cache(maxsize=None)
+def parse_patent_id(display):
+    """Canonical PatentId for a patent ID as written anywhere (memoized, so
+    repeated display IDs are a single hash lookup)."""
+    text = display.strip().upper()
+    m = _PATENT_DOCKET_RE.fullmatch(text)
+    if m:
+        return PatentId(sys.intern('CMU' + _PATENT_SEP_RE.sub('', m.group(1))), 'docket')
+    compact = _PATENT_SEP_RE.sub('', text)
+    for kind, form in _PATENT_FORMS:
+        if form.fullmatch(compact):
+            key = 'PROV' + compact if kind == 'provisional' else compact
+            return PatentId(sys.intern(key), kind)
+    return PatentId(sys.intern(compact), 'other')
+
 
 def norm_patent_id(pid):
-    """Strip hyphens from patent IDs for cross-source matching."""
-    return pid.replace('-', '').strip()
+    """Canonical key of a patent ID, for cross-source matching."""
+    return parse_patent_id(pid).key
 
 # ──────────────────────────────────────────────
-# Load Patlytics data (10 xlsx files)
+# Parsed-source cache
 # ──────────────────────────────────────────────
-def load_patlytics():
-    by_patent = defaultdict(list)   # patent_id -> [{co, prod, score, docs, category}]
-    by_product = defaultdict(list)  # (norm_co, prod) -> [{patent_id, score, category}]
+# Parsed workbooks are pickled under .build_cache/, keyed by a hash of the
+# source file's bytes plus everything that shapes the parsed records
+# (CACHE_VERSION and the company-normalization table). Unchanged sources
+# load from the pickle; only modified workbooks go back through openpyxl.
+CACHE_DIR = os.path.join(BASE_DIR, '.build_cache')
+CACHE_VERSION = 6  # bump whenever parsed record layout or norm_company() / norm_patent_id() logic changes
+
+
+def source_cache_key(path, *extra):
+    """Content hash of a source file, salted with parser inputs."""
+    h = hashlib.sha256()
+    salt = [str(CACHE_VERSION), json.dumps(COMPANY_NORM, sort_keys=True)] + list(extra)
+    h.update('\0'.join(salt).encode())
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()[:32]
+
+
+def _cache_path(kind, name, key):
+    return os.path.join(CACHE_DIR, f'{kind}-{name}-{key}.pickle')
+
+
+def cache_get(kind, name, key):
+    """Return the cached value for (kind, name, key), or None on a miss."""
+    try:
+        with open(_cache_path(kind, name, key), 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
 
-    for fname in sorted(os.listdir(PATLYTICS_DIR)):
-        if not fname.endswith('.xlsx') or fname.startswith('~'):
-            continue
-        m = re.search(r'Infringement_(.+)_2026', fname)
-        category = m.group(1).replace('_', ' ') if m else fname
 
-        wb = openpyxl.load_workbook(os.path.join(PATLYTICS_DIR, fname), data_only=True)
-        ws = wb['Analysis']
+def cache_put(kind, name, key, value):
+    """Store a parsed value and drop stale entries for the same source."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _cache_path(kind, name, key)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    prefix = f'{kind}-{name}-'
+    for fname in os.listdir(CACHE_DIR):
+        if fname.startswith(prefix) and fname.endswith('.pickle') and \
+                os.path.join(CACHE_DIR, fname) != path:
+            os.remove(os.path.join(CACHE_DIR, fname))
 
-        # Parse column headers (row 2, cols 5+)
-        headers = []
-        for c in range(5, ws.max_column + 1):
-            h = ws.cell(2, c).value
-            if not h:
-                continue
-            parts = h.split('\n')
-            prod = parts[0].strip() if len(parts) > 0 else ''
-            co = parts[1].strip() if len(parts) > 1 else ''
-            docs_s = parts[2].strip() if len(parts) > 2 else ''
-            docs_m = re.search(r'(\d+)', docs_s)
-            docs = int(docs_m.group(1)) if docs_m else 0
-            headers.append({'col': c, 'product': prod, 'company': co,
-                            'company_norm': norm_company(co), 'docs': docs})
-
-        # Parse patent rows (row 3+)
-        for r in range(3, ws.max_row + 1):
-            pid = ws.cell(r, 1).value
-            if not pid:
-                continue
-            pid_n = norm_patent_id(pid)
-            title = ws.cell(r, 2).value or ''
 
-            for h in headers:
-                score = ws.cell(r, h['col']).value
-                if score is None:
-                    continue
-                score = float(score)
-                if score <= 0:
-                    continue
-                entry = {
-                    'co': h['company'], 'co_norm': h['company_norm'],
-                    'prod': h['product'], 'score': round(score, 2),
-                    'docs': h['docs'], 'category': category,
-                }
-                by_patent[pid_n].append(entry)
-                by_product[(h['company_norm'], h['product'])].append({
-                    'patent_id': pid_n, 'score': round(score, 2),
-                    'category': category,
-                })
+# ──────────────────────────────────────────────
+# Source readers (xlsx / CSV / Parquet / Arrow)
+# ──────────────────────────────────────────────
+# Every reader yields plain row tuples starting at the header row, so the
+# Patlytics and Techson parsers do not care which format a vendor export
+# came in. xlsx keeps the workbook layout (sheet name + header row number);
+# CSV / Parquet / Arrow exports carry a single table whose first row (or
+# column names) is the header. When several formats of the same export sit
+# side by side, the fastest one wins (SOURCE_PREFERENCE).
+_CSV_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2})?)?')
+
+
+def _xlsx_rows(path, sheet, header_row):
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from wb[sheet].iter_rows(min_row=header_row, values_only=True)
+    finally:
         wb.close()
 
-    return {'by_patent': dict(by_patent), 'by_product': dict(by_product)}
+
+def _csv_rows(path):
+    # Fields stay text (empty -> None): each parser's column converters type
+    # them, so a numeric-looking text column (e.g. a bundle number) is not
+    # turned into a number the xlsx build would not have.
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.reader(f):
+            yield tuple(v if v != '' else None for v in row)
+
+
+def _arrow_rows(path):
+    if path.endswith('.parquet'):
+        table = pq.read_table(path)
+    else:
+        table = feather.read_table(path)
+    yield tuple(table.column_names)
+    yield from zip(*(col.to_pylist() for col in table.columns))
+
+
+# xlsx readers take (path, sheet, header_row); flat exports (CSV / Parquet /
+# Arrow) hold one table with its header first, so their readers take the path only
+SOURCE_READERS = {'.xlsx': _xlsx_rows, '.csv': _csv_rows}
+if pa is not None:
+    SOURCE_READERS.update({'.parquet': _arrow_rows, '.arrow': _arrow_rows,
+                           '.feather': _arrow_rows})
+SOURCE_PREFERENCE = ['.parquet', '.arrow', '.feather', '.csv', '.xlsx']
+
+
+def read_source_rows(path, sheet, header_row=1):
+    """Iterate row tuples of a source table, starting at its header row.
+    `sheet` / `header_row` locate the table in an xlsx workbook; a flat
+    export is the table itself."""
+    ext = os.path.splitext(path)[1].lower()
+    reader = SOURCE_READERS.get(ext)
+    if reader is None:
+        raise ValueError(f'Unsupported source format: {path}')
+    if ext == '.xlsx':
+        return reader(path, sheet, header_row)
+    return reader(path)
+
+
+def preferred_source(path):
+    """Fastest readable sibling of `path` (same stem, any supported format)."""
+    stem = os.path.splitext(path)[0]
+    for ext in SOURCE_PREFERENCE:
+        if ext in SOURCE_READERS and os.path.exists(stem + ext):
+            return stem + ext
+    return path
 
 
 # ──────────────────────────────────────────────
-# Load Techson data (bundled xlsx)
+# Patlytics score matrix
+# ──────────────────────────────────────────────
+# Patlytics scores form a sparse patent × product matrix. Patent IDs,
+# (company, product) keys and category names are interned once; each scored
+# cell is one slot in parallel typed arrays (row, col, score, docs, category,
+# source). Cells arrive one workbook ("source") at a time as a contiguous
+# block and can be retracted per source, so a changed workbook patches the
+# matrix — per-row/column cell lists, per-column best — without touching
+# the rest.
+#
+# Canonical cell order is (source filename, load position), i.e. the order a
+# full serial load produces. Row/column cell lists are kept in that order,
+# so sorting by score breaks ties exactly like the old by_patent /
+# by_product lists, whether the matrix was built in one go or patched.
+Entry = namedtuple('Entry', 'patent_id co_norm prod score docs category')
+
+
+class ScoreMatrix:
+    """Sparse patent × product matrix of Patlytics infringement scores."""
+
+    def __init__(self):
+        self._patents = []     # row axis: normalized patent ID
+        self._products = []    # column axis: (co_norm, product)
+        self.categories = []
+        self._row_of = {}
+        self._col_of = {}
+        self._cat_of = {}
+        self.rows = array('I')
+        self.cols = array('I')
+        self.scores = array('d')
+        self.docs = array('I')
+        self.cats = array('H')
+        self.srcs = array('I')
+        self.source_names = []   # source ordinal -> filename
+        self.sources = {}        # live filename -> (ordinal, first cell, end cell)
+        self.dead = 0            # retracted cells still occupying the arrays
+        self._row_cells = []     # row -> array of live cell ids, canonical order
+        self._col_cells = []     # col -> array of live cell ids, canonical order
+        self._col_best = array('l')
+        self._order = None
+
+    # -- persistence (plain builtins, independent of module name) --
+    def state(self):
+        d = dict(self.__dict__)
+        d['_order'] = None
+        return d
+
+    @classmethod
+    def from_state(cls, state):
+        m = cls.__new__(cls)
+        m.__dict__.update(state)
+        return m
+
+    # -- building --
+    def _key(self, i):
+        return (self.source_names[self.srcs[i]], i)
+
+    def _first(self, a, b):
+        """True if cell a outranks cell b (higher score, then canonical order)."""
+        s = self.scores
+        return s[a] > s[b] or (s[a] == s[b] and self._key(a) < self._key(b))
+
+    def add_workbook(self, name, workbook):
+        """Add (or replace) the cells of one parsed Patlytics workbook."""
+        if name in self.sources:
+            self.retract(name)
+        cat = self._cat_of.get(workbook['category'])
+        if cat is None:
+            cat = self._cat_of[workbook['category']] = len(self.categories)
+            self.categories.append(workbook['category'])
+        ordinal = len(self.source_names)
+        self.source_names.append(name)
+        appending = all(name > other for other in self.sources)
+        start = len(self.scores)
+
+        columns = workbook['columns']
+        col_ids = [None] * len(columns)
+        for pid, j, score in workbook['cells']:
+            c = col_ids[j]
+            if c is None:
+                key = tuple(columns[j][:2])
+                c = self._col_of.get(key)
+                if c is None:
+                    c = self._col_of[key] = len(self._products)
+                    self._products.append(key)
+                    self._col_cells.append(array('I'))
+                    self._col_best.append(-1)
+                col_ids[j] = c
+            r = self._row_of.get(pid)
+            if r is None:
+                r = self._row_of[pid] = len(self._patents)
+                self._patents.append(pid)
+                self._row_cells.append(array('I'))
+            i = len(self.scores)
+            self.rows.append(r)
+            self.cols.append(c)
+            self.scores.append(score)
+            self.docs.append(columns[j][2])
+            self.cats.append(cat)
+            self.srcs.append(ordinal)
+            if appending:
+                self._row_cells[r].append(i)
+                self._col_cells[c].append(i)
+            else:
+                bisect.insort(self._row_cells[r], i, key=self._key)
+                bisect.insort(self._col_cells[c], i, key=self._key)
+            b = self._col_best[c]
+            if b < 0 or self._first(i, b):
+                self._col_best[c] = i
+
+        self.sources[name] = (ordinal, start, len(self.scores))
+        self._order = None
+
+    def retract(self, name):
+        """Remove every cell contributed by one source workbook."""
+        _, start, end = self.sources.pop(name)
+        for r in set(self.rows[start:end]):
+            self._row_cells[r] = array('I', [i for i in self._row_cells[r]
+                                             if not start <= i < end])
+        for c in set(self.cols[start:end]):
+            cells = array('I', [i for i in self._col_cells[c] if not start <= i < end])
+            self._col_cells[c] = cells
+            best = -1
+            for i in cells:
+                if best < 0 or self.scores[i] > self.scores[best]:
+                    best = i
+            self._col_best[c] = best
+        self.dead += end - start
+        self._order = None
+
+    def export_source(self, name):
+        """Rebuild the parsed-workbook dict for one live source."""
+        _, start, end = self.sources[name]
+        columns, col_idx, cells = [], {}, []
+        for i in range(start, end):
+            col = (*self._products[self.cols[i]], self.docs[i])
+            j = col_idx.get(col)
+            if j is None:
+                j = col_idx[col] = len(columns)
+                columns.append(col)
+            cells.append((self._patents[self.rows[i]], j, self.scores[i]))
+        cat = self.categories[self.cats[start]] if end > start else ''
+        return {'category': cat, 'columns': columns, 'cells': cells}
+
+    def compact(self):
+        """Drop retracted cells and empty axis entries by reloading live sources."""
+        fresh = ScoreMatrix()
+        for name in sorted(self.sources):
+            fresh.add_workbook(name, self.export_source(name))
+        self.__dict__ = fresh.__dict__
+
+    # -- access --
+    def _ensure_order(self):
+        """Live rows/columns in first-appearance order, and columns per company."""
+        if self._order is None:
+            rows = sorted((r for r, cells in enumerate(self._row_cells) if cells),
+                          key=lambda r: self._key(self._row_cells[r][0]))
+            cols = sorted((c for c, cells in enumerate(self._col_cells) if cells),
+                          key=lambda c: self._key(self._col_cells[c][0]))
+            by_co = defaultdict(list)
+            for c in cols:
+                by_co[self._products[c][0]].append(c)
+            self._order = (rows, cols, dict(by_co))
+        return self._order
+
+    @property
+    def patents(self):
+        return [self._patents[r] for r in self._ensure_order()[0]]
+
+    @property
+    def n_patents(self):
+        return len(self._ensure_order()[0])
+
+    @property
+    def n_products(self):
+        return len(self._ensure_order()[1])
+
+    def entry(self, i):
+        return Entry(self._patents[self.rows[i]], *self._products[self.cols[i]],
+                     self.scores[i], self.docs[i], self.categories[self.cats[i]])
+
+    def _top(self, cells, k):
+        s = self.scores
+        if k is None:
+            ranked = sorted(cells, key=lambda i: -s[i])
+        else:
+            ranked = heapq.nsmallest(k, cells, key=lambda i: -s[i])
+        return [self.entry(i) for i in ranked]
+
+    def patent_entries(self, patent_id, k=None):
+        """Top-k entries for a patent, highest score first ([] if unscored)."""
+        r = self._row_of.get(patent_id)
+        return [] if r is None else self._top(self._row_cells[r], k)
+
+    def product_entries(self, key, k=None):
+        """Top-k entries for a (co_norm, product) column, highest score first."""
+        c = self._col_of.get(key)
+        return [] if c is None else self._top(self._col_cells[c], k)
+
+    def product_best(self):
+        """Yield ((co_norm, product), best Entry, cell count) for every column."""
+        for c in self._ensure_order()[1]:
+            yield self._products[c], self.entry(self._col_best[c]), len(self._col_cells[c])
+
+    def company_products(self, co_norm):
+        """[(product, best Entry)] for one normalized company, in column order."""
+        return [(self._products[c][1], self.entry(self._col_best[c]))
+                for c in self._ensure_order()[2].get(co_norm, [])]
+
+    def company_max(self):
+        """{co_norm: best score over all of the company's products}."""
+        s, col_best = self.scores, self._col_best
+        return {co: max(s[col_best[c]] for c in cols)
+                for co, cols in self._ensure_order()[2].items()}
+
+
+# ──────────────────────────────────────────────
+# Load Patlytics data (10 xlsx files)
 # ──────────────────────────────────────────────
-def load_techson():
-    wb = openpyxl.load_workbook(TECHSON_FILE, data_only=True)
-    ws = wb['Patents']
-    data = {}
-    for r in range(2, ws.max_row + 1):
-        pid = ws.cell(r, 3).value
+def patlytics_category(fname):
+    """Category label from a Patlytics filename (Infringement_<Cat>_2026.xlsx)."""
+    m = re.search(r'Infringement_(.+)_2026', fname)
+    return m.group(1).replace('_', ' ') if m else fname
+
+
+def parse_patlytics_headers(header_row):
+    """Parse the product header row (row 2, cols 5+) of an Analysis sheet.
+    Each header cell is 'Product\\nCompany\\nN docs'."""
+    headers = []
+    for idx in range(4, len(header_row)):
+        h = header_row[idx]
+        if not h:
+            continue
+        parts = h.split('\n')
+        prod = parts[0].strip() if len(parts) > 0 else ''
+        co = parts[1].strip() if len(parts) > 1 else ''
+        docs_s = parts[2].strip() if len(parts) > 2 else ''
+        docs_m = re.search(r'(\d+)', docs_s)
+        docs = int(docs_m.group(1)) if docs_m else 0
+        headers.append({'idx': idx, 'product': prod, 'company': co,
+                        'company_norm': norm_company(co), 'docs': docs})
+    return headers
+
+
+def parse_patlytics_workbook(path, category):
+    """Stream one Patlytics export (xlsx Analysis sheet, CSV, Parquet or Arrow).
+
+    Walks the table once, row by row, instead of issuing one ws.cell()
+    lookup per (patent, product) pair.
+    Returns {'category', 'columns': [(co_norm, product, docs)],
+    'cells': [(patent_id, column_index, score)]} with cells in sheet order."""
+    cells = []
+    rows = read_source_rows(path, 'Analysis', header_row=2)
+    headers = parse_patlytics_headers(next(rows, ()))
+
+    # Parse patent rows (row 3+)
+    for row in rows:
+        pid = row[0] if row else None
         if not pid:
             continue
         pid_n = norm_patent_id(pid)
+        width = len(row)
 
-        target_cos_raw = ws.cell(r, 6).value or ''
-        target_cos = [c.strip() for c in target_cos_raw.split('\n') if c.strip()]
-        target_cos_norm = [norm_company(c) for c in target_cos]
-
-        rev = ws.cell(r, 12).value
-        exp = ws.cell(r, 13).value
-        pri = ws.cell(r, 14).value
-
-        def fmt_date(d):
-            if isinstance(d, datetime):
-                return d.strftime('%Y-%m-%d')
-            return str(d) if d else '-'
-
-        # Col 7: Relevant Products (newline-delimited list)
-        prods_raw = ws.cell(r, 7).value or ''
-        relevant_products = [p.strip() for p in prods_raw.split('\n') if p.strip()]
-
-        data[pid_n] = {
-            'bundle_no': ws.cell(r, 1).value or '',
-            'bundle_title': ws.cell(r, 2).value or '',
-            'title': ws.cell(r, 5).value or '',
-            'quality': int(ws.cell(r, 8).value or 0),
-            'tier1': int(ws.cell(r, 9).value or 0),
-            'tier2': int(ws.cell(r, 10).value or 0),
-            'tier3': int(ws.cell(r, 11).value or 0),
-            'revenue': int(rev) if rev else 0,
-            'expiration': fmt_date(exp),
-            'priority_date': fmt_date(pri),
-            'priority_desc': ws.cell(r, 15).value or '',
-            'complexity': ws.cell(r, 16).value or '',
-            'art_volume': ws.cell(r, 17).value or '',
-            'diversity': ws.cell(r, 18).value or '',
-            'status': ws.cell(r, 19).value or '',
-            'target_cos': target_cos,
-            'target_cos_norm': target_cos_norm,
-            'relevant_products': relevant_products,
-        }
-    wb.close()
+        for j, h in enumerate(headers):
+            if h['idx'] >= width:
+                continue
+            score = row[h['idx']]
+            if score is None:
+                continue
+            score = float(score)
+            if score <= 0:
+                continue
+            cells.append((pid_n, j, round(score, 2)))
+    return {
+        'category': category,
+        'columns': [(h['company_norm'], h['product'], h['docs']) for h in headers],
+        'cells': cells,
+    }
+
+
+def patlytics_files():
+    """Sorted [(path, category)] for every Patlytics export in PATLYTICS_DIR.
+    One file per category: the fastest supported format present wins."""
+    chosen = {}
+    for fname in os.listdir(PATLYTICS_DIR):
+        stem, ext = os.path.splitext(fname)
+        if ext.lower() not in SOURCE_READERS or fname.startswith('~'):
+            continue
+        chosen[stem] = preferred_source(os.path.join(PATLYTICS_DIR, fname))
+    return [(path, patlytics_category(os.path.basename(path)))
+            for path in sorted(set(chosen.values()), key=os.path.basename)]
+
+
+def _parse_patlytics_job(job):
+    """Process-pool entry point: job is a (path, category) pair."""
+    return parse_patlytics_workbook(*job)
+
+
+def parse_patlytics_sources(files, jobs=None, cache=True):
+    """Parse [(path, category)] workbooks, in order.
+
+    Workbooks whose content hash is in the parsed-source cache are loaded
+    from it; the rest are parsed in parallel (one worker process per file,
+    up to `jobs` at a time; default = CPU count)."""
+    results = [None] * len(files)
+    keys = [None] * len(files)
+    if cache:
+        for i, (path, category) in enumerate(files):
+            keys[i] = source_cache_key(path, category)
+            results[i] = cache_get('patlytics', os.path.basename(path), keys[i])
+    misses = [i for i, r in enumerate(results) if r is None]
+
+    jobs = min(jobs or os.cpu_count() or 1, len(misses))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            parsed = list(pool.map(_parse_patlytics_job, [files[i] for i in misses]))
+    else:
+        parsed = [_parse_patlytics_job(files[i]) for i in misses]
+    for i, workbook in zip(misses, parsed):
+        results[i] = workbook
+        if cache:
+            cache_put('patlytics', os.path.basename(files[i][0]), keys[i], workbook)
+    if cache and files:
+        print(f"  cache: {len(files) - len(misses)}/{len(files)} workbooks reused")
+    return results
+
+
+def load_patlytics(jobs=None, cache=True, incremental=False):
+    """Load every Patlytics workbook into a ScoreMatrix.
+
+    Workbooks are merged in sorted filename order, so the result is the
+    same however they were parsed. With incremental=True the matrix from the
+    last build manifest is patched instead (see load_patlytics_incremental)."""
+    files = patlytics_files()
+    if incremental:
+        return load_patlytics_incremental(files, jobs, cache)
+    matrix = ScoreMatrix()
+    for (path, _), workbook in zip(files, parse_patlytics_sources(files, jobs, cache)):
+        matrix.add_workbook(os.path.basename(path), workbook)
+    return matrix
+
+
+# Incremental builds: the manifest records each workbook's content key and
+# the resulting ScoreMatrix. The next build diffs the Patlytics directory
+# against it, retracts removed/changed workbooks, parses only new/changed
+# ones and patches them in.
+BUILD_MANIFEST = os.path.join(CACHE_DIR, 'patlytics-manifest.pickle')
+
+
+def load_patlytics_incremental(files, jobs=None, cache=True):
+    keys = {os.path.basename(path): source_cache_key(path, category)
+            for path, category in files}
+    manifest = None
+    try:
+        with open(BUILD_MANIFEST, 'rb') as f:
+            manifest = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+    if manifest and manifest.get('version') == CACHE_VERSION:
+        matrix = ScoreMatrix.from_state(manifest['matrix'])
+        built = manifest['files']
+    else:
+        matrix, built = ScoreMatrix(), {}
+
+    removed = [name for name in built if name not in keys]
+    changed = [(path, category) for path, category in files
+               if built.get(os.path.basename(path)) != keys[os.path.basename(path)]]
+    for name in removed:
+        matrix.retract(name)
+    for (path, _), workbook in zip(changed, parse_patlytics_sources(changed, jobs, cache)):
+        matrix.add_workbook(os.path.basename(path), workbook)
+    if matrix.dead > len(matrix.scores) - matrix.dead:
+        matrix.compact()
+    print(f"  incremental: {len(changed)} new/changed, {len(removed)} removed, "
+          f"{len(files) - len(changed)} unchanged")
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f'{BUILD_MANIFEST}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump({'version': CACHE_VERSION, 'files': keys, 'matrix': matrix.state()},
+                    f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, BUILD_MANIFEST)
+    return matrix
+
+
+# ──────────────────────────────────────────────
+# Load Techson data (bundled xlsx)
+# ──────────────────────────────────────────────
+class TechsonPatent(NamedTuple):
+    """One row of the Techson Patents sheet."""
+    bundle_no: str
+    bundle_title: str
+    title: str
+    quality: int
+    tier1: int
+    tier2: int
+    tier3: int
+    revenue: int
+    expiration: str
+    priority_date: str
+    priority_desc: str
+    complexity: str
+    art_volume: str
+    diversity: str
+    status: str
+    target_cos: list
+    target_cos_norm: list
+    relevant_products: list
+
+
+# Patents sheet columns: field -> (accepted header spellings, legacy 1-based
+# column). Headers are matched case/punctuation-insensitively, so reordered
+# exports still load; a missing header falls back to the legacy position.
+TECHSON_COLUMNS = {
+    'bundle_no': (('bundle no', 'bundle number', 'bundle', 'bundle id'), 1),
+    'bundle_title': (('bundle title', 'bundle name'), 2),
+    'patent_id': (('patent number', 'patent no', 'patent', 'patent id',
+                   'publication number', 'patent publication number'), 3),
+    'title': (('title', 'patent title'), 5),
+    'target_cos': (('target companies', 'target company', 'targets',
+                    'target cos'), 6),
+    'relevant_products': (('relevant products', 'products',
+                           'relevant product'), 7),
+    'quality': (('quality', 'quality score', 'patent quality'), 8),
+    'tier1': (('tier 1', 'tier1', 'tier 1 targets'), 9),
+    'tier2': (('tier 2', 'tier2', 'tier 2 targets'), 10),
+    'tier3': (('tier 3', 'tier3', 'tier 3 targets'), 11),
+    'revenue': (('revenue', 'revenue at risk', 'revenue risk',
+                 'total revenue'), 12),
+    'expiration': (('expiration', 'expiration date', 'expiry',
+                    'expiry date'), 13),
+    'priority_date': (('priority date',), 14),
+    'priority_desc': (('priority description', 'priority desc',
+                       'priority'), 15),
+    'complexity': (('complexity',), 16),
+    'art_volume': (('prior art volume', 'art volume', 'prior art'), 17),
+    'diversity': (('diversity',), 18),
+    'status': (('status', 'patent status', 'legal status'), 19),
+}
+
+
+def _header_key(h):
+    return re.sub(r'[^a-z0-9]+', ' ', str(h).lower()).strip()
+
+
+def resolve_techson_columns(header_row):
+    """Map each TechsonPatent field to a 0-based column index from the header row."""
+    by_name = {}
+    for idx, h in enumerate(header_row):
+        if h is not None:
+            by_name.setdefault(_header_key(h), idx)
+    cols = {}
+    for field, (names, legacy_col) in TECHSON_COLUMNS.items():
+        idx = next((by_name[_header_key(n)] for n in names
+                    if _header_key(n) in by_name), None)
+        if idx is None:
+            print(f"  WARNING: Techson header for '{field}' not found, using column {legacy_col}")
+            idx = legacy_col - 1
+        cols[field] = idx
+    return cols
+
+
+def fmt_date(d):
+    if isinstance(d, datetime):
+        return d.strftime('%Y-%m-%d')
+    return str(d) if d else '-'
+
+
+def _as_int(v):
+    if not v:
+        return 0
+    return int(float(v)) if isinstance(v, str) else int(v)
+
+
+def _as_date(v):
+    """Display date of a cell: datetime from xlsx, ISO text from a flat export."""
+    if isinstance(v, str) and _CSV_DATE_RE.fullmatch(v.strip()):
+        v = datetime.fromisoformat(v.strip())
+    return fmt_date(v)
+
+
+def _as_str(v):
+    return v or ''
+
+
+def _split_lines(v):
+    return [p.strip() for p in (v or '').split('\n') if p.strip()]
+
+
+# Bulk converters applied column-wise after the row scan
+TECHSON_CONVERT = {
+    'quality': _as_int, 'tier1': _as_int, 'tier2': _as_int, 'tier3': _as_int,
+    'revenue': _as_int, 'expiration': _as_date, 'priority_date': _as_date,
+    'target_cos': _split_lines, 'relevant_products': _split_lines,
+}
+
+
+def parse_techson_workbook(path):
+    """Stream the Patents table once and return {patent_id: TechsonPatent}.
+
+    Columns are resolved from the header row; rows are collected column-wise
+    and each column is converted in one bulk map."""
+    rows = read_source_rows(path, 'Patents')
+    cols = resolve_techson_columns(next(rows, ()))
+    pid_col = cols['patent_id']
+    fields = [f for f in TechsonPatent._fields if f != 'target_cos_norm']
+    getters = [(f, cols[f]) for f in fields]
+    pids = []
+    raw = {f: [] for f in fields}
+    for row in rows:
+        pid = row[pid_col] if pid_col < len(row) else None
+        if not pid:
+            continue
+        pids.append(norm_patent_id(pid))
+        width = len(row)
+        for f, idx in getters:
+            raw[f].append(row[idx] if idx < width else None)
+
+    columns = {f: list(map(TECHSON_CONVERT.get(f, _as_str), vals))
+               for f, vals in raw.items()}
+    columns['target_cos_norm'] = [[norm_company(c) for c in cos]
+                                  for cos in columns['target_cos']]
+    records = zip(*(columns[f] for f in TechsonPatent._fields))
+    return {pid: TechsonPatent(*rec) for pid, rec in zip(pids, records)}
+
+
+def load_techson(cache=True):
+    """Load the Techson bundle, reusing the parsed-source cache when the
+    workbook is unchanged. A CSV / Parquet / Arrow export next to
+    TECHSON_FILE (same stem) is preferred over the xlsx."""
+    path = preferred_source(TECHSON_FILE)
+    if not cache:
+        return parse_techson_workbook(path)
+    key = source_cache_key(path)
+    cached = cache_get('techson', os.path.basename(path), key)
+    if cached is None:
+        data = parse_techson_workbook(path)
+        # Cached as plain tuples so the pickle does not depend on module name
+        cache_put('techson', os.path.basename(path), key,
+                  {pid: tuple(rec) for pid, rec in data.items()})
+    else:
+        data = {pid: TechsonPatent(*rec) for pid, rec in cached.items()}
+        print("  cache: Techson bundle reused")
     return data
 
 
@@ -286,6 +971,315 @@ PATENT_DESCRIPTIONS = {
     'WO2025194159A1': 'Extends the two-way verification approach by using multiple camera views. Makes it harder to fool with carefully staged single-angle photos.',
     'US20250182363A1': 'The same multi-hypothesis verification method as US12217339B2, applied more broadly to new types of objects and product authentication scenarios.',
 }
+PATENT_DESCRIPTIONS = {norm_patent_id(pid): desc for pid, desc in PATENT_DESCRIPTIONS.items()}
+
+
+# ──────────────────────────────────────────────
+# Base dashboard segment index
+# ──────────────────────────────────────────────
+# base_dashboard.html is parsed once into top-level nodes — one per
+# <div class="page" id="page-…"> and one per <script> block — with the text
+# between them kept as opaque filler. Enhancers read and replace whole nodes
+# by id, so each stage only touches the page it edits instead of rescanning
+# the full document, and the output is joined once at the end. Child
+# segments inside a node (pat-sections, pat-rows, pi cards, company product
+# tables) are located on demand and re-derived only when that node changes.
+#
+# Offset edits go through a per-node SpliceBuffer: insertions and span
+# replacements are recorded against the node text the segments were taken
+# from and materialized together, in offset order, the next time the node is
+# read (or at render). Several stages can therefore splice into the same
+# page without each paying for a copy of it.
+Segment = namedtuple('Segment', 'kind key start end')
+
+_DIV_TAG_RE = re.compile(r'<div\b|</div>')
+_TOP_NODE_RE = re.compile(r'<div class="page(?: active)?" id="(page-[^"]+)"|<script\b[^>]*>')
+_CHILD_RES = {
+    'pat-section': re.compile(r'<div class="pat-section" id="([^"]+)">'),
+    'pat-row': None,  # tokenized by iter_pat_rows
+    'pi': re.compile(r'<div class="pi"[^>]*data-prod="([^"]*)"'),
+    'co-table': re.compile(r'<div class="card" id="pa-co-([^"]+)"'),
+}
+
+
+# pat-row markup is tokenized with plain forward str.find scans rather than
+# regexes: sections hold every row on one long line, and a tempered
+# (?:(?!</div>).)* pattern over such lines can backtrack badly. Each row is
+# bounded by its first </div>, so every probe inside it is bounded too and a
+# page of N rows tokenizes in O(page length).
+PatRowToken = namedtuple('PatRowToken', 'section start end patent_id link_start link_end')
+
+_SECTION_OPEN = '<div class="pat-section" id="'
+_ROW_OPEN = '<div class="pat-row">'
+_LINK_CLASS = 'class="pat-link"'
+_PREFILING_DOC = '<span class="pat-doc"><span>'
+
+
+def iter_pat_rows(text, start=0, end=None):
+    """Yield a PatRowToken for each pat-row in text[start:end], in one pass.
+
+    `section` is the id of the enclosing pat-section ('' if none), start/end
+    the row's span including its closing </div>, and link_start/link_end the
+    span of its <a class="pat-link"> element (-1, -1 for pre-filings, whose ID
+    is plain text).
+    """
+    end = len(text) if end is None else end
+    section = ''
+    next_sec = text.find(_SECTION_OPEN, start, end)
+    pos = start
+    while True:
+        row_start = text.find(_ROW_OPEN, pos, end)
+        if row_start < 0:
+            return
+        while 0 <= next_sec < row_start:
+            q = next_sec + len(_SECTION_OPEN)
+            section = text[q:text.find('"', q, end)]
+            next_sec = text.find(_SECTION_OPEN, q, end)
+        row_end = text.find('</div>', row_start + len(_ROW_OPEN), end)
+        row_end = end if row_end < 0 else row_end + len('</div>')
+
+        link_start = link_end = -1
+        cls = text.find(_LINK_CLASS, row_start, row_end)
+        if cls >= 0:
+            link_start = text.rfind('<a ', row_start, cls)
+            id_start = text.find('>', cls, row_end) + 1
+            id_end = text.find('</a>', id_start, row_end)
+            link_end = id_end + len('</a>')
+        else:
+            id_start = text.find(_PREFILING_DOC, row_start, row_end)
+            if id_start >= 0:
+                id_start += len(_PREFILING_DOC)
+                id_end = text.find('</span>', id_start, row_end)
+        patent_id = text[id_start:id_end].strip() if id_start >= 0 and id_end >= 0 else ''
+        yield PatRowToken(section, row_start, row_end, patent_id, link_start, link_end)
+        pos = row_end
+
+
+def _div_end(text, start):
+    """Offset just past the </div> that closes the <div> opened at start."""
+    depth = 0
+    for m in _DIV_TAG_RE.finditer(text, start):
+        depth += 1 if m.group() == '<div' else -1
+        if depth == 0:
+            return m.end()
+    return len(text)
+
+
+class SpliceBuffer:
+    """Pending insertions / replacements against one base string.
+
+    Offsets always refer to the base text. Edits are applied in offset order;
+    at the same offset insertions come before a replacement starting there,
+    and otherwise in the order they were added. Overlapping replacements are
+    a bug in the caller and raise ValueError.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.edits = []  # (start, end, seq, new_text)
+
+    def __len__(self):
+        return len(self.edits)
+
+    def insert(self, pos, text):
+        self.edits.append((pos, pos, len(self.edits), text))
+
+    def replace(self, start, end, text):
+        self.edits.append((start, end, len(self.edits), text))
+
+    def render(self):
+        if not self.edits:
+            return self.text
+        out, last = [], 0
+        for start, end, _, new in sorted(self.edits):
+            if start < last:
+                raise ValueError(f'overlapping splice at offset {start}')
+            out.append(self.text[last:start])
+            out.append(new)
+            last = end
+        out.append(self.text[last:])
+        return ''.join(out)
+
+
+class DashboardIndex:
+    """Page and script nodes of the base dashboard, editable by element id."""
+
+    def __init__(self, text):
+        self.chunks = []     # filler and node text, in document order
+        self.nodes = {}      # node id -> chunk index (document order)
+        self.offsets = {}    # node id -> (start, end) in the base document
+        self._children = {}  # (node id, kind) -> [Segment]
+        self._splices = {}   # node id -> SpliceBuffer with pending edits
+        pos = 0
+        n_scripts = 0
+        while True:
+            m = _TOP_NODE_RE.search(text, pos)
+            if not m:
+                break
+            if m.group(1):
+                name = m.group(1)
+                end = _div_end(text, m.start())
+            else:
+                name = f'script-{n_scripts}'
+                n_scripts += 1
+                close = text.find('</script>', m.end())
+                end = len(text) if close < 0 else close + len('</script>')
+            self.chunks.append(text[pos:m.start()])
+            self.nodes[name] = len(self.chunks)
+            self.offsets[name] = (m.start(), end)
+            self.chunks.append(text[m.start():end])
+            pos = end
+        self.chunks.append(text[pos:])
+
+    def __contains__(self, name):
+        return name in self.nodes
+
+    def __getitem__(self, name):
+        buf = self._splices.pop(name, None)
+        if buf:
+            self[name] = buf.render()
+        return self.chunks[self.nodes[name]]
+
+    def __setitem__(self, name, text):
+        self._splices.pop(name, None)
+        self.chunks[self.nodes[name]] = text
+        for kind in _CHILD_RES:
+            self._children.pop((name, kind), None)
+
+    def get(self, name, default=None):
+        return self[name] if name in self.nodes else default
+
+    def ids(self, prefix=''):
+        """Node ids starting with prefix, in document order."""
+        return [name for name in self.nodes if name.startswith(prefix)]
+
+    def insert_before(self, name, text):
+        """Insert text immediately ahead of node name."""
+        self.chunks[self.nodes[name] - 1] += text
+
+    def splice(self, name):
+        """SpliceBuffer for node name; offsets match segments(name, ...)."""
+        buf = self._splices.get(name)
+        if buf is None:
+            buf = self._splices[name] = SpliceBuffer(self.chunks[self.nodes[name]])
+        return buf
+
+    def segments(self, name, kind):
+        """Child segments of one kind inside node name.
+
+        Offsets are relative to the node text before any pending splices,
+        so they can be passed straight to splice(name).
+        """
+        key = (name, kind)
+        segs = self._children.get(key)
+        if segs is None:
+            text = self.chunks[self.nodes[name]]
+            segs = []
+            if kind == 'pat-row':
+                segs = [Segment(kind, tok.patent_id, tok.start, tok.end)
+                        for tok in iter_pat_rows(text)]
+            else:
+                for m in _CHILD_RES[kind].finditer(text):
+                    segs.append(Segment(kind, m.group(1), m.start(), _div_end(text, m.start())))
+            self._children[key] = segs
+        return segs
+
+    def size(self):
+        """Current document length in characters, including pending splices."""
+        n = sum(len(chunk) for chunk in self.chunks)
+        for buf in self._splices.values():
+            n += sum(len(new) - (end - start) for start, end, _, new in buf.edits)
+        return n
+
+    def render(self):
+        for name in list(self._splices):
+            self[name]  # materialize pending splices
+        return ''.join(self.chunks)
+
+    def drain(self):
+        """Yield the document chunk by chunk, releasing each once consumed.
+
+        The index is empty afterwards; used for streaming the output."""
+        spliced = {self.nodes[name]: name for name in self._splices}
+        for i in range(len(self.chunks)):
+            if i in spliced:
+                self[spliced[i]]  # materialize pending splices
+            chunk, self.chunks[i] = self.chunks[i], ''
+            yield chunk
+        self._children.clear()
+
+
+# Line-oriented enhancers share one traversal: every line of the scanned
+# pages is classified once by a combined regex and dispatched to the
+# handlers registered for its kind. Lines of no interest (the vast majority:
+# contact tables, inline CSS/JS) cost a single failed search.
+LINE_KINDS = {
+    'pi': r'<div class="pi"[^>]*data-prod="([^"]*)"[^>]*data-company="([^"]*)"',
+    'pi_title': r'class="pi-title"',
+    'pi_contacts': r'class="pi-contacts"',
+    'page_co': r'id="page-co-([^"]+)"',
+    'prod_row': r'<td class="prod-indent">',
+}
+_LINE_KIND_RE = re.compile('|'.join(f'(?P<{kind}>{pat})' for kind, pat in LINE_KINDS.items()))
+# kind -> slice of the combined match's groups() holding that kind's own groups
+_LINE_KIND_GROUPS = {kind: slice(_LINE_KIND_RE.groupindex[kind],
+                                 _LINE_KIND_RE.groupindex[kind] + re.compile(pat).groups)
+                     for kind, pat in LINE_KINDS.items()}
+
+
+class LineScanner:
+    """Dispatches classified lines of dashboard pages to registered handlers.
+
+    A handler is called as handler(line, groups, state) and returns the line
+    to emit (it may prepend extra lines). `groups` are the capture groups of
+    the kind's LINE_KINDS pattern; `state` is a dict scoped to the page being
+    scanned, for tracking the card or company a line belongs to.
+    """
+
+    def __init__(self):
+        self.handlers = defaultdict(list)
+        self.finishers = []
+
+    def on(self, kind, handler):
+        if kind not in LINE_KINDS:
+            raise KeyError(f'unknown line kind {kind!r}')
+        self.handlers[kind].append(handler)
+
+    def after(self, fn):
+        """Call fn() once the traversal is complete."""
+        self.finishers.append(fn)
+
+    def run(self, doc, names=None):
+        names = doc.ids('page-') if names is None else names
+        for name in names:
+            lines = doc[name].split('\n')
+            state = {}
+            changed = False
+            for i, line in enumerate(lines):
+                m = _LINE_KIND_RE.search(line)
+                if m is None:
+                    continue
+                handlers = self.handlers.get(m.lastgroup)
+                if not handlers:
+                    continue
+                groups = m.groups()[_LINE_KIND_GROUPS[m.lastgroup]]
+                for handler in handlers:
+                    line = handler(line, groups, state)
+                if line is not lines[i]:
+                    lines[i] = line
+                    changed = True
+            if changed:
+                doc[name] = '\n'.join(lines)
+        for fn in self.finishers:
+            fn()
+
+
+def company_page_id(doc, co):
+    """Node id of a target company's tab ('/' may be slugged to '-')."""
+    for name in (f'page-co-{co.replace("/", "-")}', f'page-co-{co}'):
+        if name in doc:
+            return name
+    return None
 
 
 # ──────────────────────────────────────────────
@@ -309,7 +1303,7 @@ PATENTS_TO_MOVE = {
 SECTIONS_TO_DELETE = ['pat-cosine-embedding-similarity', 'pat-other-foundational']
 
 # Retail split: patents that go to "Product Detection" vs "Checkout & Verification"
-RETAIL_CHECKOUT_PATENTS = {'63/831,790', '63/794,781'}  # pre-filings (text match)
+RETAIL_CHECKOUT_PATENTS = {'63/831,790', '63/794,781'}  # pre-filings
 # US20250278988A1 comes from Object Detection via PATENTS_TO_MOVE
 # Everything else in Retail / Product AI goes to Product Detection
 
@@ -323,228 +1317,166 @@ NEW_RETAIL_CHECKOUT_DESC = (
 )
 
 
-def reorganize_patents(html_text):
-    """Reorganize patent sections: merge orphan categories, split retail, move patents.
+# Final section ordering and (title, description) after reorganization
+PATENT_SECTION_META = {
+    'pat-3d-reconstruction': ('3D Reconstruction',
+        'Patents covering methods to build 3D models from flat images — including '
+        'face reconstruction, depth estimation, and scene geometry from a single photo.'),
+    'pat-object-detection': ('Object Detection',
+        'Patents for identifying and locating objects in images and video — multiscale '
+        'detection, bounding boxes, feature pyramids, and reducing false positives.'),
+    'pat-face-recognition-analysis': ('Face Recognition / Analysis',
+        'Patents for recognizing faces, estimating age, locating facial landmarks, '
+        'iris-based identification, and foundational image matching — including methods '
+        'robust to poor lighting, extreme angles, and degraded images.'),
+    'pat-neural-network-architecture': ('Neural Network Architecture',
+        'Patents for making AI models smaller, faster, and cheaper to run — compression, '
+        'quantization, binary networks, automated architecture design, and cosine '
+        'embedding techniques.'),
+    'pat-image-processing': ('Image Processing',
+        'Patents for generating, enhancing, and transforming images — photorealistic '
+        'synthesis, deblurring, super-resolution, and data augmentation techniques.'),
+    'pat-few-shot-learning': ('Few-Shot Learning',
+        'Patents that let AI learn to recognize new objects from just a handful of '
+        'examples — critical for applications where training data is scarce.'),
+    'pat-retail-product-detection': ('Retail: Product Detection',
+        NEW_RETAIL_PRODUCT_DESC),
+    'pat-retail-checkout-verification': ('Retail: Checkout & Verification',
+        NEW_RETAIL_CHECKOUT_DESC),
+    'pat-action-scene-understanding': ('Action / Scene Understanding',
+        'Patents for understanding what is happening in a scene — detecting human '
+        'actions, skeleton tracking, and analyzing environment conditions.'),
+    'pat-verification-search': ('Verification / Search',
+        'Patents for verifying whether two objects are the same and rapidly searching '
+        'large visual databases — product authentication and reverse lookup.'),
+}
 
-    Handles the fact that all patent rows may be on a single long line within
-    each pat-section. Uses regex to parse and reconstruct sections.
+PATENT_SECTION_ORDER = [
+    'pat-3d-reconstruction',
+    'pat-object-detection',
+    'pat-face-recognition-analysis',
+    'pat-neural-network-architecture',
+    'pat-image-processing',
+    'pat-few-shot-learning',
+    'pat-retail-product-detection',
+    'pat-retail-checkout-verification',
+    'pat-action-scene-understanding',
+    'pat-verification-search',
+]
+
+
+class PortfolioPatent(NamedTuple):
+    """One portfolio patent as listed on the base Patents page."""
+    doc_id: str       # display ID: 'US10430922B2', 'WO/2025/193512A1', '63/831,790'
+    url: str          # PDF link; '' for pre-filings
+    status: str       # Issued / Published / WIPO / Pre-Filing
+    status_cls: str   # st-is / st-pub / st-wipo / st-pre
+    title: str
+    section: str      # pat-section id in the base dashboard
+
+    @property
+    def key(self):
+        """Canonical patent key (norm_patent_id)."""
+        return norm_patent_id(self.doc_id)
+
+
+def _text_after(text, marker, start, end, stop='<'):
+    """Text between `marker` and the next `stop` within text[start:end], or ''."""
+    i = text.find(marker, start, end)
+    if i < 0:
+        return ''
+    i += len(marker)
+    j = text.find(stop, i, end)
+    return text[i:j if j >= 0 else end]
+
+
+def load_portfolio(doc):
+    """Parse the portfolio patent list from the base Patents page, in page order.
+
+    The base dashboard is the only record of the portfolio (links, status,
+    titles); everything the build shows for a patent is rendered from these
+    records.
     """
-    # Parse all pat-section blocks from the HTML.
-    # Each section: <div class="pat-section" id="xxx">...content...</div>
-    # followed immediately by the next <div class="pat-section"> or end of patents page.
-    # Because sections can be on one line, we use a non-greedy approach.
-
-    # First, extract the patents page content
-    page_start = html_text.find('id="page-patents"')
-    if page_start < 0:
+    html_text = doc.get('page-patents')
+    if html_text is None:
         print("  WARNING: Could not find patents page")
-        return html_text
-
-    # Find where the patent sections live (between <div class="sg">...</div> and </div> end of page)
-    # The sections start after the stat grid
-    first_section = html_text.find('<div class="pat-section"', page_start)
-    if first_section < 0:
+        return []
+    patents = []
+    for tok in iter_pat_rows(html_text):
+        if not tok.section:
+            continue  # not inside a pat-section
+        cls = _text_after(html_text, '<span class="pat-status ', tok.start, tok.end, stop='"')
+        status = _text_after(html_text, f'{cls}">', tok.start, tok.end)
+        url = (_text_after(html_text, 'href="', tok.link_start, tok.link_end, stop='"')
+               if tok.link_start >= 0 else '')
+        title = _text_after(html_text, '<span class="pat-title">', tok.start, tok.end)
+        patents.append(PortfolioPatent(
+            html_mod.unescape(tok.patent_id), url, html_mod.unescape(status),
+            cls, html_mod.unescape(title), tok.section))
+    if not patents:
         print("  WARNING: Could not find any pat-section")
-        return html_text
-
-    # Find the end of all patent sections.
-    # All sections are on one line. Find the last </div> that closes the last pat-section,
-    # which is right before the newline or the closing </div> of the page.
-    # Strategy: find the last occurrence of '</div>' before the page-closing '</div>\n'
-    # by looking for the closing page tag pattern.
-    close_page_re = re.search(r'</div>\s*\n\s*\n\s*<!--\s*COMPANY PAGES', html_text[first_section:])
-    if close_page_re:
-        # The sections end right before the page-closing </div>
-        sections_end = first_section + close_page_re.start()
-    else:
-        # Fallback: find next page div
-        next_page = html_text.find('<div class="page"', first_section + 1)
-        if next_page > 0:
-            sections_end = html_text.rfind('</div>', first_section, next_page)
-        else:
-            sections_end = len(html_text)
+    return patents
 
-    sections_block = html_text[first_section:sections_end].strip()
 
-    # Parse individual sections using regex
-    # Each section: <div class="pat-section" id="ID">...followed by next section or end
-    section_re = re.compile(r'<div class="pat-section" id="([^"]+)">')
-    section_starts = [(m.start(), m.group(1)) for m in section_re.finditer(sections_block)]
+def organize_portfolio(patents):
+    """Reorganize patent sections: merge orphan categories, split retail, move patents.
 
-    sections = {}  # id -> full HTML string
-    for idx, (start, sec_id) in enumerate(section_starts):
-        if idx + 1 < len(section_starts):
-            end = section_starts[idx + 1][0]
-        else:
-            # Last section: find its closing </div> by counting depth
-            end = len(sections_block)
-        sections[sec_id] = sections_block[start:end]
-
-    # Parse individual pat-rows from each section
-    row_re = re.compile(r'<div class="pat-row">(.*?)</div>')
-
-    def extract_rows(section_html):
-        """Extract list of (full_row_html, patent_display_id) from a section."""
-        rows = []
-        for m in row_re.finditer(section_html):
-            row_html = m.group(0)
-            # Extract patent ID from pat-link or plain text
-            link_m = re.search(r'class="pat-link"[^>]*>([^<]+)</a>', row_html)
-            if link_m:
-                pat_id = link_m.group(1).strip()
-            else:
-                # Pre-filing: <span>CMU Docket 2026-113</span> or <span>63/831,790</span>
-                span_m = re.search(r'<span class="pat-doc"><span>([^<]+)</span>', row_html)
-                pat_id = span_m.group(1).strip() if span_m else ''
-            rows.append((row_html, pat_id))
-        return rows
-
-    def extract_header(section_html):
-        """Extract the pat-cat header HTML."""
-        m = re.search(r'<div class="pat-cat">.*?</div>', section_html)
-        return m.group(0) if m else ''
-
-    def extract_desc(section_html):
-        """Extract the pat-cat-desc HTML."""
-        m = re.search(r'<div class="pat-cat-desc">.*?</div>', section_html)
-        return m.group(0) if m else ''
-
-    def build_section(sec_id, title, count, desc, rows):
-        """Build a pat-section HTML string."""
-        parts = [f'<div class="pat-section" id="{sec_id}">']
-        parts.append(f'<div class="pat-cat"><h3>{title}</h3><span class="pat-cnt">{count}</span></div>')
-        parts.append(f'<div class="pat-cat-desc">{desc}</div>')
-        for row_html, _ in rows:
-            parts.append(row_html)
-        parts.append('</div>')
-        return ''.join(parts)
-
-    # Step 1: Collect rows that need to move
-    moved_rows = {}  # dest_section_id -> [row tuples]
-    for dest in set(PATENTS_TO_MOVE.values()):
-        moved_rows[dest] = []
-
-    # Step 2: Process each section — remove moved-out rows
+    Returns [(section_id, title, desc, [PortfolioPatent])] in display order,
+    skipping empty sections.
+    """
+    move_to = {norm_patent_id(pat): dest for pat, dest in PATENTS_TO_MOVE.items()}
+    checkout_keys = {norm_patent_id(pat) for pat in RETAIL_CHECKOUT_PATENTS}
+
+    # Step 1: Collect patents that need to move
+    moved = {dest: [] for dest in set(PATENTS_TO_MOVE.values())}
+
+    # Step 2: Group by base section — remove moved-out patents
     processed_sections = {}
-    for sec_id, sec_html in sections.items():
-        rows = extract_rows(sec_html)
-        kept = []
-        for row_html, pat_id in rows:
-            # Normalize pat_id for matching: remove slashes, spaces
-            pat_clean = pat_id.replace('/', '').replace(' ', '')
-            # Check if this patent needs to move
-            moved = False
-            for move_pat, move_dest in PATENTS_TO_MOVE.items():
-                if pat_clean == move_pat.replace('/', '').replace(' ', ''):
-                    moved_rows[move_dest].append((row_html, pat_id))
-                    moved = True
-                    break
-            if not moved:
-                kept.append((row_html, pat_id))
-        processed_sections[sec_id] = kept
+    for p in patents:
+        kept = processed_sections.setdefault(p.section, [])
+        dest = move_to.get(p.key)
+        if dest:
+            moved[dest].append(p)
+        else:
+            kept.append(p)
 
     # Step 3: Split Retail / Product AI
     retail_id = 'pat-retail-product-ai'
     if retail_id in processed_sections:
-        retail_rows = processed_sections[retail_id]
-        product_det_rows = []
-        checkout_rows = []
-        for row_html, pat_id in retail_rows:
-            if pat_id in RETAIL_CHECKOUT_PATENTS:
-                checkout_rows.append((row_html, pat_id))
+        product_det = []
+        checkout = []
+        for p in processed_sections.pop(retail_id):
+            if p.key in checkout_keys:
+                checkout.append(p)
             else:
-                product_det_rows.append((row_html, pat_id))
+                product_det.append(p)
 
-        # Add any rows moved TO checkout from other sections
-        checkout_rows.extend(moved_rows.get('pat-retail-checkout-verification', []))
-        moved_rows.pop('pat-retail-checkout-verification', None)
+        # Add any patents moved TO checkout from other sections
+        checkout.extend(moved.pop('pat-retail-checkout-verification', []))
 
-        processed_sections['pat-retail-product-detection'] = product_det_rows
-        processed_sections['pat-retail-checkout-verification'] = checkout_rows
-        del processed_sections[retail_id]
+        processed_sections['pat-retail-product-detection'] = product_det
+        processed_sections['pat-retail-checkout-verification'] = checkout
 
-    # Step 4: Add moved rows to their destination sections
-    for dest, rows in moved_rows.items():
+    # Step 4: Add moved patents to their destination sections
+    for dest, moved_patents in moved.items():
         if dest in processed_sections:
-            processed_sections[dest].extend(rows)
+            processed_sections[dest].extend(moved_patents)
 
     # Step 5: Remove deleted sections
     for sec_id in SECTIONS_TO_DELETE:
         processed_sections.pop(sec_id, None)
 
-    # Step 6: Define the final ordering and metadata
-    SECTION_META = {
-        'pat-3d-reconstruction': ('3D Reconstruction',
-            'Patents covering methods to build 3D models from flat images — including '
-            'face reconstruction, depth estimation, and scene geometry from a single photo.'),
-        'pat-object-detection': ('Object Detection',
-            'Patents for identifying and locating objects in images and video — multiscale '
-            'detection, bounding boxes, feature pyramids, and reducing false positives.'),
-        'pat-face-recognition-analysis': ('Face Recognition / Analysis',
-            'Patents for recognizing faces, estimating age, locating facial landmarks, '
-            'iris-based identification, and foundational image matching — including methods '
-            'robust to poor lighting, extreme angles, and degraded images.'),
-        'pat-neural-network-architecture': ('Neural Network Architecture',
-            'Patents for making AI models smaller, faster, and cheaper to run — compression, '
-            'quantization, binary networks, automated architecture design, and cosine '
-            'embedding techniques.'),
-        'pat-image-processing': ('Image Processing',
-            'Patents for generating, enhancing, and transforming images — photorealistic '
-            'synthesis, deblurring, super-resolution, and data augmentation techniques.'),
-        'pat-few-shot-learning': ('Few-Shot Learning',
-            'Patents that let AI learn to recognize new objects from just a handful of '
-            'examples — critical for applications where training data is scarce.'),
-        'pat-retail-product-detection': ('Retail: Product Detection',
-            NEW_RETAIL_PRODUCT_DESC),
-        'pat-retail-checkout-verification': ('Retail: Checkout & Verification',
-            NEW_RETAIL_CHECKOUT_DESC),
-        'pat-action-scene-understanding': ('Action / Scene Understanding',
-            'Patents for understanding what is happening in a scene — detecting human '
-            'actions, skeleton tracking, and analyzing environment conditions.'),
-        'pat-verification-search': ('Verification / Search',
-            'Patents for verifying whether two objects are the same and rapidly searching '
-            'large visual databases — product authentication and reverse lookup.'),
-    }
-
-    SECTION_ORDER = [
-        'pat-3d-reconstruction',
-        'pat-object-detection',
-        'pat-face-recognition-analysis',
-        'pat-neural-network-architecture',
-        'pat-image-processing',
-        'pat-few-shot-learning',
-        'pat-retail-product-detection',
-        'pat-retail-checkout-verification',
-        'pat-action-scene-understanding',
-        'pat-verification-search',
-    ]
-
-    # Step 7: Rebuild all sections in order
-    new_sections = []
-    total_patents = 0
-    for sec_id in SECTION_ORDER:
-        rows = processed_sections.get(sec_id, [])
-        if not rows:
-            continue
-        title, desc = SECTION_META.get(sec_id, (sec_id, ''))
-        new_sections.append(build_section(sec_id, title, len(rows), desc, rows))
-        total_patents += len(rows)
-
-    new_sections_html = ''.join(new_sections)
-
-    # Step 8: Replace the old sections block with the new one
-    # Also update the page-desc to reflect the category count
-    # Preserve the newline before the page-closing </div>
-    result = html_text[:first_section] + new_sections_html + '\n' + html_text[sections_end:]
+    # Step 6: Final ordering and metadata
+    organized = []
+    for sec_id in PATENT_SECTION_ORDER:
+        members = processed_sections.get(sec_id, [])
+        if members:
+            title, desc = PATENT_SECTION_META.get(sec_id, (sec_id, ''))
+            organized.append((sec_id, title, desc, members))
 
-    # Update category count in page description
-    cat_count = len([s for s in SECTION_ORDER if s in processed_sections and processed_sections[s]])
-    result = result.replace(
-        '63 patents across 10 technology categories',
-        f'{total_patents} patents across {cat_count} technology categories')
-
-    print(f"  Reorganized: {total_patents} patents across {cat_count} categories")
-    return result
+    total = sum(len(members) for *_, members in organized)
+    print(f"  Reorganized: {total} patents across {len(organized)} categories")
+    return organized
 
 
 # ──────────────────────────────────────────────
@@ -586,6 +1518,7 @@ NEW_CSS = """
 
 /* Patlytics badge on product cards */
 .pi-pat-score{font-size:10px;font-weight:700;padding:2px 7px;border-radius:2px;background:rgba(155,89,182,.1);color:#8e44ad;font-family:-apple-system,sans-serif;margin-left:4px}
+.pi-pat-score.pi-match-fuzzy{background:none;border:1px dashed rgba(142,68,173,.5)}
 .pi-pat-none{font-size:10px;padding:2px 7px;border-radius:2px;background:rgba(139,145,154,.06);color:var(--t3);font-family:-apple-system,sans-serif;margin-left:4px}
 /* Techson badge on product cards */
 .pi-ts-badge{font-size:10px;font-weight:600;padding:2px 7px;border-radius:2px;background:rgba(41,128,185,.1);color:#2980b9;font-family:-apple-system,sans-serif;margin-left:4px}
@@ -766,8 +1699,13 @@ CATEGORY_PATLYTICS_MAP = {
 }
 
 
-def build_category_overview():
-    """Build the category overview + legend HTML for the top of the Patents page."""
+def build_category_overview(section_counts=None):
+    """Build the category overview + legend HTML for the top of the Patents page.
+
+    section_counts maps section id (e.g. 'pat-object-detection') to the number
+    of patents rendered in it; categories missing from it use the static count.
+    """
+    section_counts = section_counts or {}
     h = []
     h.append('<div class="cat-overview">')
     h.append('<h3 class="cat-overview-hdr">Category Overview</h3>')
@@ -796,7 +1734,7 @@ def build_category_overview():
         h.append(f'<tr>')
         h.append(f'<td class="cat-name"><a href="#" onclick="document.getElementById(\'pat-{sec_id}\').scrollIntoView({{behavior:\'smooth\',block:\'start\'}});return false" '
                  f'style="color:var(--a);text-decoration:none">{esc(cat_name)}</a></td>')
-        h.append(f'<td class="cat-count">{info["count"]}</td>')
+        h.append(f'<td class="cat-count">{section_counts.get(f"pat-{sec_id}", info["count"])}</td>')
         h.append(f'<td>{esc(info["desc"])}</td>')
         h.append(f'</tr>')
 
@@ -834,6 +1772,73 @@ def build_category_overview():
     return '\n'.join(h)
 
 
+# ──────────────────────────────────────────────
+# Per-company aggregation
+# ──────────────────────────────────────────────
+# One pass over the Patlytics products and one over the Techson patents
+# yield the stats of every company at once; the Litigation page, the company
+# tab cards and their fragment cache keys all read from this table instead
+# of re-scanning both sources per company.
+class CompanyStats(NamedTuple):
+    """Patlytics / Techson figures for one normalized company."""
+    products: tuple = ()      # ((product, best Entry, cell count), ...), best score first
+    best_score: float = 0
+    ts_patents: int = 0       # Techson patents targeting the company
+    ts_revenue: float = 0
+    ts_quality_sum: float = 0
+
+    @property
+    def avg_quality(self):
+        return self.ts_quality_sum / self.ts_patents if self.ts_patents else 0
+
+    @property
+    def n_scored_patents(self):
+        """Distinct source patents behind the company's best product scores."""
+        return len({best.patent_id for _, best, _ in self.products})
+
+
+class CompanyTable(NamedTuple):
+    companies: dict           # co_norm -> CompanyStats, for every company seen in either source
+    extended: list            # [(co_norm, product, best Entry, cell count)] outside `targets`, best first
+    total_revenue: float      # portfolio-wide Techson revenue risk
+    high_score_products: int  # products with a best score of 70%+
+    high_quality_patents: int # Techson patents of quality 7+
+
+    def get(self, co):
+        return self.companies.get(co) or CompanyStats()
+
+
+def aggregate_companies(patlytics, techson, targets=TARGET_12):
+    """Build the CompanyTable in one pass over each source."""
+    products = defaultdict(list)
+    extended = []
+    high_score = 0
+    for (co_norm, prod), best, n_cells in patlytics.product_best():
+        products[co_norm].append((prod, best, n_cells))
+        if co_norm not in targets:
+            extended.append((co_norm, prod, best, n_cells))
+        high_score += best.score >= 0.70
+
+    ts = defaultdict(lambda: [0, 0, 0])  # co_norm -> [patents, revenue, quality sum]
+    total_rev = 0
+    high_q = 0
+    for td in techson.values():
+        total_rev += td.revenue
+        high_q += td.quality >= 7
+        for co_norm in set(td.target_cos_norm):
+            acc = ts[co_norm]
+            acc[0] += 1
+            acc[1] += td.revenue
+            acc[2] += td.quality
+
+    companies = {}
+    for co in dict.fromkeys([*products, *ts]):
+        prods = tuple(sorted(products.get(co, ()), key=lambda x: -x[1].score))
+        companies[co] = CompanyStats(prods, prods[0][1].score if prods else 0, *ts.get(co, (0, 0, 0)))
+    extended.sort(key=lambda x: -x[2].score)
+    return CompanyTable(companies, extended, total_rev, high_score, high_q)
+
+
 # ──────────────────────────────────────────────
 # Build the Litigation Targets landing page
 # ──────────────────────────────────────────────
@@ -858,54 +1863,22 @@ def co_icon(company, size=16):
             f'font-size:{fs}px;line-height:{size}px">{letter}</span>')
 
 
-def build_litigation_page(patlytics, techson):
-    """Build HTML for the Litigation Targets landing page."""
-    # Aggregate per-company stats
-    co_stats = {}
-    for co in TARGET_12:
-        co_stats[co] = {
-            'patlytics_scores': [],  # (product, score, patent_id)
-            'techson_patents': 0,
-            'techson_quality_sum': 0,
-            'techson_revenue': 0,
-        }
-
-    # Patlytics aggregation
-    for (co_norm, prod), entries in patlytics['by_product'].items():
-        if co_norm in co_stats:
-            best = max(entries, key=lambda e: e['score'])
-            co_stats[co_norm]['patlytics_scores'].append(
-                (prod, best['score'], best['patent_id'], best['category']))
-
-    # Techson aggregation
-    for pid, td in techson.items():
-        for co_norm in set(td['target_cos_norm']):
-            if co_norm in co_stats:
-                co_stats[co_norm]['techson_patents'] += 1
-                co_stats[co_norm]['techson_quality_sum'] += td['quality']
-                co_stats[co_norm]['techson_revenue'] += td['revenue']
-
-    # Sort each company's patlytics scores descending
-    for co in co_stats:
-        co_stats[co]['patlytics_scores'].sort(key=lambda x: -x[1])
+def build_litigation_page(patlytics, techson, stats=None):
+    """Build HTML for the Litigation Targets landing page from the
+    per-company `stats` (a CompanyTable; aggregated here when not given)."""
+    stats = stats or aggregate_companies(patlytics, techson)
 
     # Compute combined score for ranking
     def combined_score(co):
-        cs = co_stats[co]
-        best_pat = cs['patlytics_scores'][0][1] if cs['patlytics_scores'] else 0
-        avg_q = (cs['techson_quality_sum'] / cs['techson_patents']
-                 if cs['techson_patents'] else 0)
-        return best_pat * 40 + avg_q * 3 + (cs['techson_revenue'] / 1e9) * 2
+        cs = stats.get(co)
+        return cs.best_score * 40 + cs.avg_quality * 3 + (cs.ts_revenue / 1e9) * 2
 
     ranked = sorted(TARGET_12, key=combined_score, reverse=True)
 
     # Stats
-    total_rev = sum(td['revenue'] for td in techson.values())
-    high_score_products = sum(
-        1 for entries in patlytics['by_product'].values()
-        if any(e['score'] >= 0.70 for e in entries)
-    )
-    high_q_patents = sum(1 for td in techson.values() if td['quality'] >= 7)
+    total_rev = stats.total_revenue
+    high_score_products = stats.high_score_products
+    high_q_patents = stats.high_quality_patents
 
     html = []
     html.append(f'<div class="page" id="page-litigation">')
@@ -925,14 +1898,13 @@ def build_litigation_page(patlytics, techson):
     # Company cards
     html.append(f'<div class="lit-cards">')
     for co in ranked:
-        cs = co_stats[co]
-        best_score = cs['patlytics_scores'][0][1] if cs['patlytics_scores'] else 0
-        avg_q = (cs['techson_quality_sum'] / cs['techson_patents']
-                 if cs['techson_patents'] else 0)
+        cs = stats.get(co)
+        best_score = cs.best_score
+        avg_q = cs.avg_quality
 
-        if best_score >= 0.80 or cs['techson_revenue'] >= 5e9:
+        if best_score >= 0.80 or cs.ts_revenue >= 5e9:
             verdict, vc = 'HIGH RISK', 'lv-high'
-        elif best_score >= 0.50 or cs['techson_revenue'] >= 1e9:
+        elif best_score >= 0.50 or cs.ts_revenue >= 1e9:
             verdict, vc = 'MODERATE', 'lv-moderate'
         else:
             verdict, vc = 'LOW', 'lv-low'
@@ -945,8 +1917,8 @@ def build_litigation_page(patlytics, techson):
         html.append(f'<span class="co-mono" style="background:{color}">{letter}</span>')
         html.append(f'<h3>{esc(co)}</h3>')
         html.append(f'<span class="lit-verdict {vc}">{verdict}</span>')
-        if cs['techson_revenue']:
-            html.append(f'<span class="lit-rev">{fmt_revenue(cs["techson_revenue"])} exposure</span>')
+        if cs.ts_revenue:
+            html.append(f'<span class="lit-rev">{fmt_revenue(cs.ts_revenue)} exposure</span>')
         html.append(f'<span class="lit-arrow">&#x203A;</span>')
         html.append(f'</div>')
 
@@ -954,16 +1926,16 @@ def build_litigation_page(patlytics, techson):
         html.append(f'<div class="lit-body">')
 
         # Patlytics row
-        if cs['patlytics_scores']:
-            top3 = cs['patlytics_scores'][:5]
+        if cs.products:
+            top3 = cs.products[:5]
             html.append(f'<div class="lit-src-row">')
             html.append(f'<span class="src-badge src-patlytics">Patlytics</span> ')
             parts = []
-            for prod, sc, pat, cat in top3:
-                cls = score_class(sc)
-                parts.append(f'{esc(prod)}: <strong class="{cls}">{sc:.0%}</strong>')
+            for prod, best, _ in top3:
+                cls = score_class(best.score)
+                parts.append(f'{esc(prod)}: <strong class="{cls}">{best.score:.0%}</strong>')
             html.append(' &bull; '.join(parts))
-            html.append(f'<br><span style="font-size:10px;color:var(--t3)">{len(cs["patlytics_scores"])} products analyzed across {len(set(e[2] for e in cs["patlytics_scores"]))} patents</span>')
+            html.append(f'<br><span style="font-size:10px;color:var(--t3)">{len(cs.products)} products analyzed across {cs.n_scored_patents} patents</span>')
             html.append(f'</div>')
         else:
             html.append(f'<div class="lit-src-row"><span class="src-badge src-patlytics">Patlytics</span> No products scored for {esc(co)}</div>')
@@ -971,10 +1943,10 @@ def build_litigation_page(patlytics, techson):
         # Techson row
         html.append(f'<div class="lit-src-row">')
         html.append(f'<span class="src-badge src-techson">Techson</span> ')
-        if cs['techson_patents']:
-            html.append(f'<strong>{cs["techson_patents"]}</strong> patents target {esc(co)} &bull; ')
+        if cs.ts_patents:
+            html.append(f'<strong>{cs.ts_patents}</strong> patents target {esc(co)} &bull; ')
             html.append(f'Avg quality: <strong>{avg_q:.1f}</strong>/9 &bull; ')
-            html.append(f'Revenue risk: <strong>{fmt_revenue(cs["techson_revenue"])}</strong>')
+            html.append(f'Revenue risk: <strong>{fmt_revenue(cs.ts_revenue)}</strong>')
         else:
             html.append(f'No patents targeting {esc(co)} in Techson analysis')
         html.append(f'</div>')
@@ -991,17 +1963,11 @@ def build_litigation_page(patlytics, techson):
     html.append(f'</div>')  # lit-cards
 
     # Extended targets (non-12 companies with high scores)
-    ext_targets = []
-    for (co_norm, prod), entries in patlytics['by_product'].items():
-        if co_norm in TARGET_12:
-            continue
-        best = max(entries, key=lambda e: e['score'])
-        ext_targets.append({
-            'company': co_norm, 'product': prod,
-            'score': best['score'], 'patent_id': best['patent_id'],
-            'category': best['category'], 'patent_count': len(entries),
-        })
-    ext_targets.sort(key=lambda x: -x['score'])
+    ext_targets = [{
+        'company': co_norm, 'product': prod,
+        'score': best.score, 'patent_id': best.patent_id,
+        'category': best.category, 'patent_count': n_cells,
+    } for co_norm, prod, best, n_cells in stats.extended]
 
     if ext_targets:
         html.append(f'<div class="ext-targets">')
@@ -1030,111 +1996,172 @@ def build_litigation_page(patlytics, techson):
 
 
 # ──────────────────────────────────────────────
-# Enhance patent rows
+# Render the Patents page
 # ──────────────────────────────────────────────
-def enhance_patent_rows(html_text, patlytics, techson):
-    """Inject Techson + Patlytics badges into patent rows and add expandable details.
-    NOTE: All patent rows may be on a single long line, so we use regex on the full string."""
-
-    def build_detail(pid_n, ts, pl_entries):
-        """Build expandable detail panel HTML for a patent."""
-        d = [f'<div class="pat-detail" id="pd-{pid_n}">',
-             f'<div class="pat-detail-grid">']
-
-        # Left: Techson
-        d.append('<div class="pat-src-section">')
-        d.append('<h4><span class="src-badge src-techson">Techson</span> Patent Assessment</h4>')
-        if ts:
-            d.append('<div class="pat-meta-grid">')
-            d.append(f'<div class="pat-meta-item"><div class="lbl">Quality Score</div><div><strong>{ts.get("quality","?")}</strong>/9</div></div>')
-            d.append(f'<div class="pat-meta-item"><div class="lbl">Revenue at Risk</div><div><strong>{fmt_revenue(ts.get("revenue",0))}</strong></div></div>')
-            d.append(f'<div class="pat-meta-item"><div class="lbl">Patent Status</div><div>{esc(ts.get("status","?"))}</div></div>')
-            d.append(f'<div class="pat-meta-item"><div class="lbl">Expiration</div><div>{esc(ts.get("expiration","-"))}</div></div>')
-            d.append(f'<div class="pat-meta-item"><div class="lbl">Prior Art</div><div>{esc(ts.get("art_volume","?"))}</div></div>')
-            d.append('</div>')
-            target_12_here = sorted(set(c for c in ts.get('target_cos_norm', []) if c in TARGET_12))
-            if target_12_here:
-                d.append(f'<div style="font-size:11px;margin-top:4px"><span style="color:var(--t3)">Targets:</span> {", ".join(esc(c) for c in target_12_here)}</div>')
-            others = [c for c in ts.get('target_cos', []) if norm_company(c) not in TARGET_12]
-            if others:
-                d.append(f'<div style="font-size:10px;color:var(--t3);margin-top:2px">+ {", ".join(esc(c) for c in others[:8])}{"..." if len(others) > 8 else ""}</div>')
-        else:
-            d.append('<div style="font-size:11px;color:var(--t3)">Not in Techson analysis (WIPO/pre-filing patent)</div>')
+# The page is rendered in one pass from the organized portfolio records
+# (load_portfolio / organize_portfolio) through these templates.
+PATENTS_PAGE_TEMPLATE = """<div class="page" id="page-patents">
+  <div class="flex-header"><h2>Our Patent Portfolio</h2></div>
+  <div class="page-desc">{n_patents} patents across {n_categories} technology categories. Assignee: Carnegie Mellon University. Inventor: Marios Savvides et al.</div>
+  <div class="sg">
+    <div class="sc"><div class="l">Total Patents</div><div class="v">{n_patents}</div></div>
+    <div class="sc"><div class="l">Issued</div><div class="v v-gn">{n_issued}</div></div>
+    <div class="sc"><div class="l">Published Apps</div><div class="v v-a">{n_published}</div></div>
+    <div class="sc"><div class="l">WIPO / PCT</div><div class="v v-hi">{n_wipo}</div></div>
+    <div class="sc"><div class="l">Pre-Filing</div><div class="v">{n_prefiling}</div></div>
+  </div>
+  {overview}
+{filters}
+{sections}
+</div>"""
 
-        # Plain-English description (fills blank space on left side)
-        desc = PATENT_DESCRIPTIONS.get(pid_n, '')
-        if desc:
-            d.append(f'<div class="pat-desc-block"><div class="pat-desc-label">What This Patent Does</div><div class="pat-desc-text">{esc(desc)}</div></div>')
-        d.append('</div>')
+PAT_SECTION_TEMPLATE = ('<div class="pat-section" id="{sec_id}">'
+                        '<div class="pat-cat"><h3>{title}</h3><span class="pat-cnt">{count}</span></div>'
+                        '<div class="pat-cat-desc">{desc}</div>{rows}</div>')
 
-        # Right: Patlytics
-        d.append('<div class="pat-src-section">')
-        d.append('<h4><span class="src-badge src-patlytics">Patlytics</span> Infringement Scores</h4>')
-        if pl_entries:
-            sorted_e = sorted(pl_entries, key=lambda e: -e['score'])
-            visible_count = 12
-            d.append(f'<table class="pat-score-tbl" id="pst-{pid_n}"><thead><tr><th>Company</th><th>Product</th><th>Score</th><th title="Number of source documents supporting the infringement analysis">Evidence</th></tr></thead><tbody>')
-            for i, e in enumerate(sorted_e):
-                cls = score_class(e['score'])
-                hidden = ' style="display:none" class="pst-extra"' if i >= visible_count else ''
-                d.append(f'<tr{hidden}><td>{esc(e["co_norm"])}</td><td>{esc(e["prod"])}</td>'
-                         f'<td class="{cls}">{e["score"]:.0%}</td><td>{e["docs"]} docs</td></tr>')
-            d.append('</tbody></table>')
-            if len(sorted_e) > visible_count:
-                d.append(f'<div style="margin-top:4px"><a href="#" onclick="togglePatScoreRows(\'{pid_n}\',this);return false" '
-                         f'style="font-size:10px;color:var(--a)">Show {len(sorted_e)-visible_count} more</a></div>')
-        else:
-            d.append('<div style="font-size:11px;color:var(--t3)">No Patlytics scores available</div>')
+PAT_ROW_TEMPLATE = ('<div class="pat-row"{onclick}><span class="pat-status {status_cls}">{status}</span>'
+                    '<span class="pat-doc">{doc}</span><span class="pat-title">{title}</span>{badges}</div>')
+
+PAT_FILTERS_HTML = """<div class="pat-filters">
+<select id="pat-q-filter" class="pat-filter-sel" onchange="applyPatFilters()">
+<option value="all">All Quality</option>
+<option value="high">High (7-9)</option>
+<option value="mid">Medium (4-6)</option>
+<option value="low">Low (2-3)</option>
+</select>
+<select id="pat-s-filter" class="pat-filter-sel" onchange="applyPatFilters()">
+<option value="all">All Status</option>
+<option value="Active">Active</option>
+<option value="Pending">Pending</option>
+</select>
+</div>"""
+
+
+def build_patent_detail(pid_n, ts, pl_entries):
+    """Build expandable detail panel HTML for a patent."""
+    d = [f'<div class="pat-detail" id="pd-{pid_n}">',
+         f'<div class="pat-detail-grid">']
+
+    # Left: Techson
+    d.append('<div class="pat-src-section">')
+    d.append('<h4><span class="src-badge src-techson">Techson</span> Patent Assessment</h4>')
+    if ts:
+        d.append('<div class="pat-meta-grid">')
+        d.append(f'<div class="pat-meta-item"><div class="lbl">Quality Score</div><div><strong>{ts.quality}</strong>/9</div></div>')
+        d.append(f'<div class="pat-meta-item"><div class="lbl">Revenue at Risk</div><div><strong>{fmt_revenue(ts.revenue)}</strong></div></div>')
+        d.append(f'<div class="pat-meta-item"><div class="lbl">Patent Status</div><div>{esc(ts.status)}</div></div>')
+        d.append(f'<div class="pat-meta-item"><div class="lbl">Expiration</div><div>{esc(ts.expiration)}</div></div>')
+        d.append(f'<div class="pat-meta-item"><div class="lbl">Prior Art</div><div>{esc(ts.art_volume)}</div></div>')
         d.append('</div>')
+        target_12_here = sorted(set(c for c in ts.target_cos_norm if c in TARGET_12))
+        if target_12_here:
+            d.append(f'<div style="font-size:11px;margin-top:4px"><span style="color:var(--t3)">Targets:</span> {", ".join(esc(c) for c in target_12_here)}</div>')
+        others = [c for c in ts.target_cos if norm_company(c) not in TARGET_12]
+        if others:
+            d.append(f'<div style="font-size:10px;color:var(--t3);margin-top:2px">+ {", ".join(esc(c) for c in others[:8])}{"..." if len(others) > 8 else ""}</div>')
+    else:
+        d.append('<div style="font-size:11px;color:var(--t3)">Not in Techson analysis (WIPO/pre-filing patent)</div>')
+
+    # Plain-English description (fills blank space on left side)
+    desc = PATENT_DESCRIPTIONS.get(pid_n, '')
+    if desc:
+        d.append(f'<div class="pat-desc-block"><div class="pat-desc-label">What This Patent Does</div><div class="pat-desc-text">{esc(desc)}</div></div>')
+    d.append('</div>')
+
+    # Right: Patlytics
+    d.append('<div class="pat-src-section">')
+    d.append('<h4><span class="src-badge src-patlytics">Patlytics</span> Infringement Scores</h4>')
+    if pl_entries:
+        sorted_e = pl_entries
+        visible_count = 12
+        d.append(f'<table class="pat-score-tbl" id="pst-{pid_n}"><thead><tr><th>Company</th><th>Product</th><th>Score</th><th title="Number of source documents supporting the infringement analysis">Evidence</th></tr></thead><tbody>')
+        for i, e in enumerate(sorted_e):
+            cls = score_class(e.score)
+            hidden = ' style="display:none" class="pst-extra"' if i >= visible_count else ''
+            d.append(f'<tr{hidden}><td>{esc(e.co_norm)}</td><td>{esc(e.prod)}</td>'
+                     f'<td class="{cls}">{e.score:.0%}</td><td>{e.docs} docs</td></tr>')
+        d.append('</tbody></table>')
+        if len(sorted_e) > visible_count:
+            d.append(f'<div style="margin-top:4px"><a href="#" onclick="togglePatScoreRows(\'{pid_n}\',this);return false" '
+                     f'style="font-size:10px;color:var(--a)">Show {len(sorted_e)-visible_count} more</a></div>')
+    else:
+        d.append('<div style="font-size:11px;color:var(--t3)">No Patlytics scores available</div>')
+    d.append('</div>')
+
+    d.append('</div></div>')  # close grid + detail
+    return ''.join(d)
 
-        d.append('</div></div>')  # close grid + detail
-        return ''.join(d)
-
-    # Process each pat-row using regex on the full HTML string
-    # Pattern: <div class="pat-row">...<a ...class="pat-link">PATENT_ID</a>...</div>
-    # IMPORTANT: The middle group must NOT cross </div> boundaries — otherwise it
-    # can span from a pre-filing row (no pat-link) into the next section's row.
-    # We use a negative lookahead (?:(?!</div>).)* to ensure we stay within one row.
-    pat_row_re = re.compile(
-        r'(<div class="pat-row">)((?:(?!</div>).)*?class="pat-link"[^>]*>)([^<]+)(</a>(?:(?!</div>).)*?)(</div>)',
-        re.DOTALL)
-
-    def replace_row(m):
-        prefix = m.group(1)      # <div class="pat-row">
-        mid1 = m.group(2)        # ...class="pat-link"...>
-        pat_display = m.group(3) # patent ID text
-        mid2 = m.group(4)        # </a>...remaining spans
-        close = m.group(5)       # </div>
-
-        pid_n = norm_patent_id(pat_display.replace('/', ''))
-        ts = techson.get(pid_n, {})
-        pl_entries = patlytics['by_patent'].get(pid_n, [])
-
-        # Build badges
-        badges = []
-        if ts:
-            q = ts.get('quality', 0)
-            badges.append(f'<span class="pat-q {quality_class(q)}" title="Techson Quality Score">Quality {q}/9</span>')
-            rev = ts.get('revenue', 0)
-            if rev:
-                badges.append(f'<span class="pat-rev" title="Techson Revenue Risk">{fmt_revenue(rev)}</span>')
-        if pl_entries:
-            best = max(pl_entries, key=lambda e: e['score'])
-            cls = score_class(best['score'])
-            badges.append(f'<span class="pat-top-inf"><span class="src-badge src-patlytics">P</span> {esc(best["co_norm"])} <strong class="{cls}">{best["score"]:.0%}</strong></span>')
-
-        badge_html = f'<span class="pat-badges">{"".join(badges)}</span>' if badges else ''
-
-        # Add onclick and badges
-        new_prefix = f'<div class="pat-row" onclick="togglePatDetail(\'{pid_n}\')">'
-        row_html = f'{new_prefix}{mid1}{pat_display}{mid2}{badge_html}{close}'
-
-        # Add expandable detail after the row
-        detail_html = build_detail(pid_n, ts, pl_entries)
-        return row_html + detail_html
-
-    result = pat_row_re.sub(replace_row, html_text)
-    return result
+
+def render_patent_row(p, patlytics, techson, fragments=None):
+    """Patent row with Techson + Patlytics badges and its expandable detail.
+
+    Pre-filings (no published document to link) render as a plain row. The
+    detail panel is taken from `fragments` when pre-rendered.
+    """
+    if not p.url:
+        return PAT_ROW_TEMPLATE.format(
+            onclick='', status_cls=p.status_cls, status=esc(p.status),
+            doc=f'<span>{esc(p.doc_id)}</span>', title=esc(p.title), badges='')
+
+    pid_n = p.key
+    ts = techson.get(pid_n)
+    pl_entries = patlytics.patent_entries(pid_n)  # highest score first
+
+    # Build badges
+    badges = []
+    if ts:
+        q = ts.quality
+        badges.append(f'<span class="pat-q {quality_class(q)}" title="Techson Quality Score">Quality {q}/9</span>')
+        rev = ts.revenue
+        if rev:
+            badges.append(f'<span class="pat-rev" title="Techson Revenue Risk">{fmt_revenue(rev)}</span>')
+    if pl_entries:
+        best = pl_entries[0]
+        cls = score_class(best.score)
+        badges.append(f'<span class="pat-top-inf"><span class="src-badge src-patlytics">P</span> {esc(best.co_norm)} <strong class="{cls}">{best.score:.0%}</strong></span>')
+
+    badge_html = f'<span class="pat-badges">{"".join(badges)}</span>' if badges else ''
+
+    row_html = PAT_ROW_TEMPLATE.format(
+        onclick=f' onclick="togglePatDetail(\'{pid_n}\')"',
+        status_cls=p.status_cls, status=esc(p.status),
+        doc=f'<a href="{esc(p.url)}" target="_blank" class="pat-link">{esc(p.doc_id)}</a>',
+        title=esc(p.title), badges=badge_html)
+
+    # Add expandable detail after the row
+    detail_html = (fragments or {}).get(('patent-detail', pid_n))
+    if detail_html is None:
+        detail_html = build_patent_detail(pid_n, ts, pl_entries)
+    return row_html + detail_html
+
+
+def portfolio_section_counts(sections):
+    """((section_id, patent count), ...) for organize_portfolio() output."""
+    return tuple((sec_id, len(members)) for sec_id, _, _, members in sections)
+
+
+def render_patents_page(sections, patlytics, techson, fragments=None):
+    """Render the whole Patents page from organize_portfolio() output."""
+    counts = portfolio_section_counts(sections)
+    overview_html = (fragments or {}).get(('category-overview', counts))
+    if overview_html is None:
+        overview_html = build_category_overview(dict(counts))
+    status_counts = defaultdict(int)
+    section_html = []
+    for sec_id, title, desc, members in sections:
+        for p in members:
+            status_counts[p.status_cls] += 1
+        section_html.append(PAT_SECTION_TEMPLATE.format(
+            sec_id=sec_id, title=title, count=len(members), desc=desc,
+            rows=''.join(render_patent_row(p, patlytics, techson, fragments) for p in members)))
+
+    return PATENTS_PAGE_TEMPLATE.format(
+        n_patents=sum(status_counts.values()), n_categories=len(sections),
+        n_issued=status_counts['st-is'], n_published=status_counts['st-pub'],
+        n_wipo=status_counts['st-wipo'], n_prefiling=status_counts['st-pre'],
+        overview=overview_html,
+        filters=PAT_FILTERS_HTML,
+        sections=''.join(section_html))
 
 
 # ──────────────────────────────────────────────
@@ -1143,35 +2170,66 @@ def enhance_patent_rows(html_text, patlytics, techson):
 # Maps (company, dashboard_product_name) → True when Techson's "Relevant Products"
 # reference the same product (even if names differ slightly).
 # Derived by matching Techson Col 7 product names to our 12 target companies,
-# then fuzzy-matching against dashboard product names.
+# then fuzzy-matching against dashboard product names: MANUAL_MATCHES below
+# are the confirmed links; name matches within the company are suggestions.
+
+# Company detection patterns for Techson product names
+TECHSON_CO_PATTERNS = {
+    'Google': r'\bgoogle\b|\balphabet\b|\bwaymo\b|\byoutube\b',
+    'Amazon': r'\bamazon\b|\baws\b|\bring\b(?!\s*(?:buffer|topology|network))',
+    'Apple': r'\bapple\b|\bface\s*id\b|\bcore\s*ml\b|\bios\s+photos\b|\biphone\b|\bipad\b',
+    'Microsoft': r'\bmicrosoft\b|\bazure\b|\bwindows\s*hello\b|\bkinect\b|\bbing\b',
+    'Meta': r'\bmeta\s+(?:ai|quest)\b|\bfacebook\b|\binstagram\b|\bpytorch\b',
+    'NVIDIA': r'\bnvidia\b|\bjetson\b|\btensorrt\b',
+    'Tesla': r'\btesla\b|\bautopilot\b',
+    'Samsung': r'\bsamsung\b|\bgalaxy\b|\bbixby\b',
+    'OpenAI': r'\bopenai\b|\bgpt-?4\b|\bdall.?e\b|\bchatgpt\b',
+    'Qualcomm': r'\bqualcomm\b|\bsnapdragon\b',
+    'SoftBank/ARM': r'\bsoftbank\b|\barm\s+ethos\b|\barm\s+nn\b',
+}
+# All patterns as one alternation, one named group per company (group names
+# must be identifiers, hence c0..cN): a single finditer() labels a product
+# with every company it mentions. The terms of different companies never
+# overlap, so no mention is hidden behind another company's match.
+_TECHSON_CO_RE = re.compile('|'.join(f'(?P<c{i}>{pat})'
+                                     for i, pat in enumerate(TECHSON_CO_PATTERNS.values())), re.I)
+_TECHSON_CO_GROUPS = {f'c{i}': co for i, co in enumerate(TECHSON_CO_PATTERNS)}
+
+
+@lru_cache(maxsize=None)
+def techson_product_companies(prod):
+    """Target companies a Techson product string refers to: brand patterns,
+    plus a leading company name resolved by norm_company."""
+    cos = {_TECHSON_CO_GROUPS[m.lastgroup] for m in _TECHSON_CO_RE.finditer(prod)}
+    co = norm_company(prod)
+    if co in TARGET_12:
+        cos.add(co)
+    return frozenset(cos)
+
+
+def techson_products_by_company(techson):
+    """Techson products mapped to our companies.
+    Returns: { company: { techson_product_name: n_patents_listing_it } }"""
+    ts_by_co = defaultdict(lambda: defaultdict(int))
+    for td in techson.values():
+        for prod in set(td.relevant_products):
+            for co in techson_product_companies(prod):
+                ts_by_co[co][prod] += 1
+    return ts_by_co
+
+
+def build_techson_suggestion_index(techson):
+    """Techson products indexed for suggesting dashboard matches by name,
+    preferring the product listed by the most patents (see ProductNameIndex)."""
+    return ProductNameIndex({(co, prod): {'techson_product': prod, 'best_score': n}
+                             for co, prods in techson_products_by_company(techson).items()
+                             for prod, n in prods.items()})
+
 
 def build_techson_product_set(techson):
     """Build set of dashboard products that Techson also identifies.
     Returns: { (company, dash_product_name): techson_product_name }"""
 
-    # Company detection patterns for Techson product names
-    CO_PAT = {
-        'Google': re.compile(r'\bgoogle\b|\balphabet\b|\bwaymo\b|\byoutube\b', re.I),
-        'Amazon': re.compile(r'\bamazon\b|\baws\b|\bring\b(?!\s*(?:buffer|topology|network))', re.I),
-        'Apple': re.compile(r'\bapple\b|\bface\s*id\b|\bcore\s*ml\b|\bios\s+photos\b|\biphone\b|\bipad\b', re.I),
-        'Microsoft': re.compile(r'\bmicrosoft\b|\bazure\b|\bwindows\s*hello\b|\bkinect\b|\bbing\b', re.I),
-        'Meta': re.compile(r'\bmeta\s+(?:ai|quest)\b|\bfacebook\b|\binstagram\b|\bpytorch\b', re.I),
-        'NVIDIA': re.compile(r'\bnvidia\b|\bjetson\b|\btensorrt\b', re.I),
-        'Tesla': re.compile(r'\btesla\b|\bautopilot\b', re.I),
-        'Samsung': re.compile(r'\bsamsung\b|\bgalaxy\b|\bbixby\b', re.I),
-        'OpenAI': re.compile(r'\bopenai\b|\bgpt-?4\b|\bdall.?e\b|\bchatgpt\b', re.I),
-        'Qualcomm': re.compile(r'\bqualcomm\b|\bsnapdragon\b', re.I),
-        'SoftBank/ARM': re.compile(r'\bsoftbank\b|\barm\s+ethos\b|\barm\s+nn\b', re.I),
-    }
-
-    # Collect all Techson products mapped to our companies
-    ts_by_co = {}  # company -> set of product names
-    for pid, td in techson.items():
-        for prod in td.get('relevant_products', []):
-            for co, pat in CO_PAT.items():
-                if pat.search(prod):
-                    ts_by_co.setdefault(co, set()).add(prod)
-
     # Manual overrides: (company, dashboard_product) -> True
     # These handle cases where names differ significantly but refer to the same product
     MANUAL_MATCHES = {
@@ -1237,164 +2295,641 @@ def build_techson_product_set(techson):
 # Enhance product cards
 # ──────────────────────────────────────────────
 def build_product_patlytics_lookup(patlytics):
-    """Build lookup: (norm_company, product_name) -> best_score + patent list.
-    Also try matching dashboard product names to Patlytics product names."""
+    """Build lookup: (norm_company, product_name) -> best_score + patent list,
+    indexed for matching dashboard product names (see ProductNameIndex)."""
     lookup = {}
-    for (co_norm, prod), entries in patlytics['by_product'].items():
-        best = max(entries, key=lambda e: e['score'])
-        sorted_e = sorted(entries, key=lambda e: -e['score'])
-        lookup[(co_norm, prod)] = {
-            'best_score': best['score'],
-            'best_patent': best['patent_id'],
-            'entries': sorted_e[:8],
+    for key, best, _ in patlytics.product_best():
+        lookup[key] = {
+            'best_score': best.score,
+            'best_patent': best.patent_id,
+            'entries': patlytics.product_entries(key, 8),
         }
-    return lookup
+    return ProductNameIndex(lookup)
 
 
 def _tokenize(s):
     """Extract meaningful words from a product name (lowercase)."""
     return set(re.findall(r'[a-z][a-z0-9]+', s.lower()))
 
-def find_patlytics_for_product(dash_prod, dash_co, pl_lookup):
-    """Try to find Patlytics data for a dashboard product.
-    Uses: 1) exact match, 2) substring match, 3) word overlap match."""
-    # 1. Exact match
-    key = (dash_co, dash_prod)
-    if key in pl_lookup:
-        return pl_lookup[key]
-
-    dash_lower = dash_prod.lower()
-    candidates = [(co, prod, data) for (co, prod), data in pl_lookup.items()
-                  if co == dash_co]
-
-    # 2. Substring match
-    best_match = None
-    best_score = 0
-    for co, prod, data in candidates:
-        prod_lower = prod.lower()
-        if dash_lower in prod_lower or prod_lower in dash_lower:
-            if data['best_score'] > best_score:
-                best_match = data
-                best_score = data['best_score']
-    if best_match:
-        return best_match
-
-    # 3. Word overlap: dashboard products often use "X / Y" format or descriptive names.
-    #    Match if a Patlytics product shares 2+ significant words with dashboard product.
-    dash_tokens = _tokenize(dash_prod)
-    # Remove very common/short words
-    stop_words = {'the', 'and', 'for', 'with', 'from', 'pro', 'gen', 'new', 'via'}
-    dash_tokens -= stop_words
-
-    if len(dash_tokens) < 2:
+
+# Words too common in product names to count towards a word-overlap match
+_MATCH_STOP_WORDS = frozenset({'the', 'and', 'for', 'with', 'from', 'pro', 'gen', 'new', 'via'})
+
+
+def _trigrams(s):
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+# Fuzzy name matching: last resort after exact / substring / word overlap,
+# for renamed products. A rule match is rated by its rule, a fuzzy match by
+# its name similarity; either way the confidence is in [0, 1], rounded to
+# two places so every place that shows it agrees.
+FUZZY_MATCH_THRESHOLD = 0.6  # min cosine similarity for a fuzzy match
+MATCH_RULE_CONFIDENCE = {'exact': 1.0, 'substring': 0.85, 'words': 0.7}
+MATCH_RULE_LABELS = {'substring': 'substring match', 'words': 'shared-word match'}
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+
+def _char_ngrams(name, n=3):
+    """Character n-gram counts of a product name, case- and punctuation-
+    insensitive, padded so word starts and ends form their own grams."""
+    s = f" {_NON_ALNUM_RE.sub(' ', name.lower()).strip()} "
+    grams = defaultdict(int)
+    for i in range(len(s) - n + 1):
+        grams[s[i:i + n]] += 1
+    return grams
+
+
+class ProductSimilarity:
+    """TF-IDF character trigram cosine similarity over vendor product names.
+
+    Every name becomes a sparse, L2-normalized TF-IDF vector (smoothed IDF
+    over all indexed names). Per company, an inverted index maps each gram
+    to its (name, weight) postings, so a query accumulates dot products over
+    only the names sharing a gram with it, and the top k are picked from
+    those with a heap — no dense matrix, no pass over the whole company."""
+
+    def __init__(self, names_by_company):
+        df = defaultdict(int)
+        grams_by_company = {}
+        for co, names in names_by_company.items():
+            grams_by_company[co] = [_char_ngrams(name) for name in names]
+            for grams in grams_by_company[co]:
+                for gram in grams:
+                    df[gram] += 1
+        n_docs = sum(len(names) for names in names_by_company.values())
+        self._idf = {gram: math.log((1 + n_docs) / (1 + d)) + 1 for gram, d in df.items()}
+        self._idf_unseen = math.log(1 + n_docs) + 1
+        self._postings = {}  # company -> gram -> ([name index], [weight])
+        for co, all_grams in grams_by_company.items():
+            postings = defaultdict(lambda: ([], []))
+            for i, grams in enumerate(all_grams):
+                for gram, w in self._vector(grams).items():
+                    ids, weights = postings[gram]
+                    ids.append(i)
+                    weights.append(w)
+            self._postings[co] = dict(postings)
+
+    def _vector(self, grams):
+        vec = {gram: tf * self._idf.get(gram, self._idf_unseen) for gram, tf in grams.items()}
+        norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+        return {gram: w / norm for gram, w in vec.items()}
+
+    def scores(self, company, name):
+        """{name index: cosine similarity} for every indexed name of `company`
+        sharing a trigram with `name`."""
+        postings = self._postings.get(company)
+        acc = defaultdict(float)
+        if postings:
+            for gram, w in self._vector(_char_ngrams(name)).items():
+                hit = postings.get(gram)
+                if hit:
+                    for i, wd in zip(*hit):
+                        acc[i] += w * wd
+        return acc
+
+    def top_k(self, company, name, k=5):
+        """Best `k` (name index, similarity) for `name`, most similar first
+        (earliest indexed name on ties)."""
+        acc = self.scores(company, name)
+        return heapq.nsmallest(k, acc.items(), key=lambda hit: (-hit[1], hit[0]))
+
+    def top_k_batch(self, queries, k=5):
+        """top_k for many (company, name) queries: {query: [(index, similarity)]}."""
+        return {query: self.top_k(*query, k=k) for query in dict.fromkeys(queries)}
+
+
+NameMatch = namedtuple('NameMatch', 'product data method confidence')  # method: exact/substring/words/fuzzy
+
+
+class ProductNameIndex:
+    """Vendor product lookup, prebuilt for matching dashboard product names.
+
+    `lookup` maps (company, vendor product) -> data with a 'best_score'.
+    A dashboard product resolves to the vendor product of the same company
+    that 1) has exactly its name, else 2) contains or is contained in its name
+    (case-insensitive), else 3) shares 2+ significant words, or one word of
+    4+ letters, with it — in 2) and 3) the highest-scoring candidate, earliest
+    first on ties — else 4) is the most similar name by ProductSimilarity, at
+    FUZZY_MATCH_THRESHOLD or above. Instead of scanning every product for each query, each
+    company keeps a trigram index (candidates containing the query name), a
+    leading-trigram index (candidates contained in it) and a word inverted
+    index, so a query only touches products that can actually match."""
+
+    def __init__(self, lookup):
+        self.lookup = lookup
+        self._companies = {}
+        for (co, prod), data in lookup.items():
+            c = self._companies.get(co)
+            if c is None:
+                c = self._companies[co] = {'products': [], 'names': [], 'data': [],
+                                           'grams': defaultdict(list), 'leads': defaultdict(list),
+                                           'short': [], 'words': defaultdict(list)}
+            i = len(c['names'])
+            name = prod.lower()
+            c['products'].append(prod)
+            c['names'].append(name)
+            c['data'].append(data)
+            for gram in _trigrams(name):
+                c['grams'][gram].append(i)
+            if len(name) >= 3:
+                c['leads'][name[:3]].append(i)
+            else:
+                c['short'].append(i)
+            for word in _tokenize(prod) - _MATCH_STOP_WORDS:
+                c['words'][word].append(i)
+        self.similarity = ProductSimilarity({co: c['products'] for co, c in self._companies.items()})
+        # Fuzzy similarities weigh grams by an IDF over every company's names
+        self._names_key = hashlib.sha256('\0'.join(sorted(
+            f'{co}\0{prod}' for co, prod in lookup)).encode()).hexdigest()[:16]
+
+    def __contains__(self, key):
+        return key in self.lookup
+
+    def __getitem__(self, key):
+        return self.lookup[key]
+
+    def catalogue_key(self, company):
+        """Hash of everything a match for the company depends on: its products
+        in index order with their scores, plus every indexed name (the fuzzy
+        IDF). Changes whenever matching again could give another result."""
+        c = self._companies.get(company)
+        products = list(zip(c['products'], (d['best_score'] for d in c['data']))) if c else []
+        return hashlib.sha256(repr((self._names_key, products)).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _best(c, candidates):
+        """Highest-scoring candidate (earliest on ties); None unless score > 0."""
+        best = max(candidates, key=lambda i: (c['data'][i]['best_score'], -i), default=None)
+        if best is None or not c['data'][best]['best_score'] > 0:
+            return None
+        return best
+
+    def _substring_candidates(self, c, dash_lower):
+        names = c['names']
+        if len(dash_lower) < 3:
+            return [i for i, name in enumerate(names)
+                    if dash_lower in name or name in dash_lower]
+        # Patlytics names containing the dashboard name hold all its trigrams
+        grams = sorted(_trigrams(dash_lower), key=lambda g: len(c['grams'].get(g, ())))
+        found = set(c['grams'].get(grams[0], ()))
+        for gram in grams[1:]:
+            if not found:
+                break
+            found.intersection_update(c['grams'][gram])
+        found = {i for i in found if dash_lower in names[i]}
+        # ... and names contained in the dashboard name start with one of its trigrams
+        for gram in _trigrams(dash_lower):
+            found.update(i for i in c['leads'].get(gram, ()) if names[i] in dash_lower)
+        found.update(i for i in c['short'] if names[i] in dash_lower)
+        return found
+
+    def find(self, dash_prod, dash_co):
+        """Vendor data for a dashboard product, or None."""
+        match = self.match(dash_prod, dash_co)
+        return match.data if match else None
+
+    def match(self, dash_prod, dash_co):
+        """NameMatch for a dashboard product, or None."""
+        # 1. Exact match
+        data = self.lookup.get((dash_co, dash_prod))
+        if data is not None:
+            return NameMatch(dash_prod, data, 'exact', MATCH_RULE_CONFIDENCE['exact'])
+        c = self._companies.get(dash_co)
+        if c is None:
+            return None
+
+        def found(i, method, confidence=None):
+            if confidence is None:
+                confidence = MATCH_RULE_CONFIDENCE[method]
+            return NameMatch(c['products'][i], c['data'][i], method, round(confidence, 2))
+
+        # 2. Substring match
+        best = self._best(c, self._substring_candidates(c, dash_prod.lower()))
+        if best is not None:
+            return found(best, 'substring')
+
+        # 3. Word overlap: dashboard products often use "X / Y" format or descriptive names.
+        #    Match if a Patlytics product shares 2+ significant words with dashboard product,
+        #    or 1 word if it's a distinctive product name (4+ chars)
+        dash_tokens = _tokenize(dash_prod) - _MATCH_STOP_WORDS
+        if len(dash_tokens) >= 2:
+            overlap = defaultdict(int)
+            distinctive = set()
+            for word in dash_tokens:
+                for i in c['words'].get(word, ()):
+                    overlap[i] += 1
+                    if len(word) >= 4:
+                        distinctive.add(i)
+            best = self._best(c, [i for i, n in overlap.items() if n >= 2 or i in distinctive])
+            if best is not None:
+                return found(best, 'words')
+
+        # 4. Fuzzy: the most similar name (character trigram TF-IDF cosine)
+        for i, sim in self.similarity.top_k(dash_co, dash_prod, k=3):
+            if sim < FUZZY_MATCH_THRESHOLD:
+                break
+            if c['data'][i]['best_score'] > 0:
+                return found(i, 'fuzzy', sim)
         return None
 
-    for co, prod, data in candidates:
-        pl_tokens = _tokenize(prod) - stop_words
-        overlap = dash_tokens & pl_tokens
-        # Need at least 2 word overlap, or 1 word if it's a distinctive product name (4+ chars)
-        distinctive = [w for w in overlap if len(w) >= 4]
-        if len(overlap) >= 2 or (len(distinctive) >= 1 and len(overlap) >= 1):
-            if data['best_score'] > best_score:
-                best_match = data
-                best_score = data['best_score']
 
-    return best_match
+# ──────────────────────────────────────────────
+# Persisted product-match table
+# ──────────────────────────────────────────────
+# Every (company, dashboard product) → vendor product link is recorded in
+# MATCH_TABLE_FILE with how it was found, so later builds reuse it instead of
+# matching again and a product keeps its match from build to build.
+# Statuses:
+#   confirmed  manual link (MANUAL_MATCHES) or a suggestion approved in review
+#   auto       rule-based Patlytics match (exact / substring / words / fuzzy),
+#              or 'none' when nothing matched
+#   suggested  Techson name match awaiting review; not shown on the dashboard
+#   rejected   reviewed and refused: the product has no link to that vendor
+# MATCH_TABLE_FILE is the source of truth for reviewed matches: a reviewer
+# edits the status in the JSON file, and the file is kept with the sources.
+# MANUAL_MATCHES are applied on top on every build — they replace whatever
+# the table holds for their products, and a manual link removed from the
+# code is retired. A recorded link is dropped when its vendor product
+# disappears, and every automatic entry but an exact-name link is dropped
+# when the company's vendor catalogue (names, scores or the fuzzy IDF)
+# changes, so all of them get matched again: a build gives the same links
+# from a saved table as from a fresh one.
+# The file is only rewritten when its contents change.
+MATCH_TABLE_VERSION = 1
+MATCH_REVIEW_CONFIDENCE = 0.75  # automatic matches below this confidence (word overlap,
+                                # weak fuzzy) go to the review report
+
+
+class MatchTable:
+    """Product-match records keyed by (vendor, company, dashboard product)."""
+
+    FIELDS = ('vendor', 'company', 'product', 'vendor_product', 'source', 'confidence', 'status')
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self.catalogues = {}  # vendor -> company -> catalogue key the 'none' entries were made against
+        self.new = []  # entries recorded during this build
+        self._saved = None  # file contents as loaded, to skip rewriting them unchanged
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self._saved = f.read()
+            data = json.loads(self._saved)
+            if data.get('version') == MATCH_TABLE_VERSION:
+                self.catalogues = data['catalogues']
+                for entry in data['matches']:
+                    self.entries[entry['vendor'], entry['company'], entry['product']] = entry
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, vendor, company, product):
+        return self.entries.get((vendor, company, product))
+
+    def record(self, vendor, company, product, vendor_product, source, confidence, status):
+        entry = dict(zip(self.FIELDS, (vendor, company, product, vendor_product, source,
+                                       confidence, status)))
+        self.entries[vendor, company, product] = entry
+        self.new.append(entry)
+        return entry
+
+    def drop(self, vendor, company, product):
+        self.entries.pop((vendor, company, product), None)
+
+    def apply_manual(self, vendor, links):
+        """Make `links` ({(company, product): vendor product}) the confirmed
+        manual records of `vendor`: they override any other record of those
+        products, and manual records no longer listed are dropped."""
+        for k, entry in list(self.entries.items()):
+            if k[0] == vendor and k[1:] not in links and entry['source'] == 'manual' \
+                    and entry['status'] == 'confirmed':
+                del self.entries[k]
+        for (company, product), vendor_product in links.items():
+            entry = self.get(vendor, company, product)
+            if not entry or (entry['vendor_product'], entry['source'], entry['status']) != \
+                    (vendor_product, 'manual', 'confirmed'):
+                self.record(vendor, company, product, vendor_product, 'manual', 1.0, 'confirmed')
+
+    def sync_catalogue(self, vendor, company, key):
+        """Forget the company's automatic entries, except exact-name links, if
+        its catalogue changed: they are matched again against the new one.
+        Reviewed, suggested and manual entries stay."""
+        known = self.catalogues.setdefault(vendor, {})
+        if known.get(company) != key:
+            for k, entry in list(self.entries.items()):
+                if k[:2] == (vendor, company) and entry['status'] == 'auto' \
+                        and entry['source'] != 'exact':
+                    del self.entries[k]
+            known[company] = key
+
+    def state(self):
+        return self.entries, self.catalogues
+
+    @classmethod
+    def from_state(cls, state):
+        table = cls()
+        table.entries, table.catalogues = state
+        return table
+
+    def review(self):
+        """Entries still waiting for a person to look at them: Techson
+        suggestions and low-confidence automatic Patlytics matches."""
+        return [e for e in self.entries.values() if e['vendor_product'] and
+                (e['status'] == 'suggested' or
+                 e['status'] == 'auto' and e['confidence'] < MATCH_REVIEW_CONFIDENCE)]
+
+    def save(self, review_path=None):
+        """Write the table if its contents changed, and bring the review
+        report in line with it: the entries pending review, or no file when
+        there are none. Returns whether the table was written."""
+        if not self.path:
+            return False
+        data = {'version': MATCH_TABLE_VERSION, 'catalogues': self.catalogues,
+                'matches': [self.entries[k] for k in sorted(self.entries)]}
+        text = json.dumps(data, indent=1, ensure_ascii=False)
+        written = text != self._saved
+        if written:
+            tmp = f'{self.path}.{os.getpid()}.tmp'
+            with open(tmp, 'w') as f:
+                f.write(text)
+            os.replace(tmp, self.path)
+            self._saved = text
+        if review_path:
+            review = self.review()
+            if review:
+                with open(review_path, 'w', newline='') as f:
+                    w = csv.writer(f)
+                    w.writerow(self.FIELDS)
+                    for e in sorted(review, key=lambda e: (e['confidence'], e['company'], e['product'])):
+                        w.writerow([e[k] for k in self.FIELDS])
+            elif os.path.exists(review_path):
+                os.remove(review_path)
+        return written
 
 
-def enhance_product_cards(html_text, patlytics, techson):
+# ──────────────────────────────────────────────
+# Product resolution (shared by every product stage)
+# ──────────────────────────────────────────────
+# (lookup data or None, bool, NameMatch behind the Patlytics data or None)
+ProductMatch = namedtuple('ProductMatch', 'patlytics techson pl_match')
+
+
+class ProductResolver:
+    """Build-scoped resolution of dashboard products to Patlytics/Techson data.
+
+    The Patlytics index and Techson product map are built once, and every
+    (company, dashboard product) is resolved once: product cards, company tab
+    rows and product panel fragments all resolve through the same instance,
+    so they cannot disagree about a product's score. Links recorded in the
+    match table are reused as they are; only products it has not seen go
+    through matching, and are recorded. Pool workers get a copy of the
+    table, so they resolve identically."""
+
+    def __init__(self, patlytics, techson, table=None):
+        self.pl_lookup = build_product_patlytics_lookup(patlytics)
+        self.ts_suggest = build_techson_suggestion_index(techson)
+        self.table = table if table is not None else MatchTable()
+        self.table.apply_manual('techson', build_techson_product_set(techson))
+        for vendor, index in (('patlytics', self.pl_lookup), ('techson', self.ts_suggest)):
+            for co in TARGET_12:
+                self.table.sync_catalogue(vendor, co, index.catalogue_key(co))
+        self._resolved = {}
+        self.reused = 0
+
+    def __len__(self):
+        return len(self._resolved)
+
+    def _resolve_patlytics(self, company, prod_name):
+        entry = self.table.get('patlytics', company, prod_name)
+        if entry:
+            if entry['status'] == 'rejected' or entry['vendor_product'] is None:
+                return None
+            data = self.pl_lookup.lookup.get((company, entry['vendor_product']))
+            if data is not None:
+                confidence = MATCH_RULE_CONFIDENCE.get(entry['source'], entry['confidence'])
+                return NameMatch(entry['vendor_product'], data, entry['source'], round(confidence, 2))
+            self.table.drop('patlytics', company, prod_name)  # vendor product gone: match again
+        pl_match = self.pl_lookup.match(prod_name, company)
+        if pl_match:
+            self.table.record('patlytics', company, prod_name, pl_match.product,
+                              pl_match.method, pl_match.confidence, 'auto')
+        else:
+            self.table.record('patlytics', company, prod_name, None, 'none', 0.0, 'auto')
+        return pl_match
+
+    def _resolve_techson(self, company, prod_name):
+        entry = self.table.get('techson', company, prod_name)
+        # Reviewed links stand as they are; a suggestion is made again when
+        # its Techson product is gone
+        if entry and (entry['status'] in ('confirmed', 'rejected') or entry['vendor_product'] is None
+                      or (company, entry['vendor_product']) in self.ts_suggest):
+            return entry['status'] == 'confirmed'
+        suggestion = self.ts_suggest.match(prod_name, company)
+        if suggestion:
+            self.table.record('techson', company, prod_name, suggestion.product,
+                              suggestion.method, suggestion.confidence, 'suggested')
+        else:
+            self.table.record('techson', company, prod_name, None, 'none', 0.0, 'auto')
+        return False
+
+    def resolve(self, company, prod_name):
+        key = (company, prod_name)
+        match = self._resolved.get(key)
+        if match is None:
+            pl_match = self._resolve_patlytics(company, prod_name)
+            match = self._resolved[key] = ProductMatch(pl_match.data if pl_match else None,
+                                                       self._resolve_techson(company, prod_name),
+                                                       pl_match)
+        else:
+            self.reused += 1
+        return match
+
+
+def enhance_product_cards(scanner, resolver):
     """Add Patlytics infringement score and Techson overlap badge to product card headers.
     Also adds data-patlytics and data-techson attributes for sorting.
-    Uses per-line processing: each pi card starts on its own line, and each card's
-    sub-elements (pi-title, pi-body, pi-contacts) are on separate lines within a
-    15-line block."""
-    pl_lookup = build_product_patlytics_lookup(patlytics)
-    ts_product_map = build_techson_product_set(techson)
-
-    lines = html_text.split('\n')
-    new_lines = []
-    current_card_data = None  # Track which card we're in
-    current_card_techson = False  # Track Techson overlap
-
-    for i, line in enumerate(lines):
-        # Detect start of a product card
-        pi_match = re.search(r'<div class="pi"[^>]*data-prod="([^"]*)"[^>]*data-company="([^"]*)"', line)
-        if pi_match:
-            prod_name = html_mod.unescape(pi_match.group(1))
-            company = html_mod.unescape(pi_match.group(2))
-            current_card_data = find_patlytics_for_product(prod_name, company, pl_lookup)
-            current_card_techson = (company, prod_name) in ts_product_map
-
-            # Add data attributes for sorting
-            pat_score = current_card_data['best_score'] if current_card_data else 0
-            ts_val = 1 if current_card_techson else 0
-            line = line.replace(
-                f'data-prod="{pi_match.group(1)}"',
-                f'data-prod="{pi_match.group(1)}" data-patlytics="{pat_score:.2f}" data-techson="{ts_val}"'
-            )
-
+    Registers line handlers on `scanner`: each pi card starts on its own line, and
+    its sub-elements (pi-title, pi-body, pi-contacts) are on separate lines
+    within a 15-line block. Products are matched through `resolver`."""
+
+    def card_start(line, groups, state):
+        # Start of a product card — look up its Patlytics/Techson data
+        prod_attr, co_attr = groups
+        prod_name = html_mod.unescape(prod_attr)
+        company = html_mod.unescape(co_attr)
+        card_data, card_techson, pl_match = resolver.resolve(company, prod_name)
+        state['card'] = card_data
+        state['techson'] = card_techson
+        state['match'] = pl_match
+
+        # Add data attributes for sorting (and the Patlytics name-match confidence)
+        pat_score = card_data['best_score'] if card_data else 0
+        ts_val = 1 if card_techson else 0
+        conf = f' data-match-conf="{pl_match.confidence:.2f}"' if pl_match else ''
+        return line.replace(
+            f'data-prod="{prod_attr}"',
+            f'data-prod="{prod_attr}" data-patlytics="{pat_score:.2f}" data-techson="{ts_val}"{conf}'
+        )
+
+    def card_title(line, groups, state):
         # Inject badges on contact-badge line (within current card)
-        if (current_card_data is not None or current_card_techson) and 'contact-badge' in line and 'pi-title' in line:
-            badges = ''
-            if current_card_data:
-                score_pct = f'{current_card_data["best_score"]:.0%}'
-                badges += f' <span class="pi-pat-score" title="Patlytics best infringement score">{score_pct}</span>'
-            if current_card_techson:
-                badges += ' <span class="pi-ts-badge" title="Techson also identifies this product">Techson</span>'
-            if badges:
-                line = line.replace('</span></div>', f'</span>{badges}</div>', 1)
-
+        card_data = state.get('card')
+        card_techson = state.get('techson')
+        if (card_data is None and not card_techson) or 'contact-badge' not in line:
+            return line
+        badges = ''
+        if card_data:
+            score_pct = f'{card_data["best_score"]:.0%}'
+            pl_match = state['match']
+            cls, title = 'pi-pat-score', 'Patlytics best infringement score'
+            if pl_match.method == 'fuzzy':
+                title += f' \u2014 matched to {esc(pl_match.product)} ({pl_match.confidence:.0%} name similarity)'
+            elif pl_match.method != 'exact':
+                title += f' \u2014 matched to {esc(pl_match.product)} ({MATCH_RULE_LABELS.get(pl_match.method, pl_match.method)})'
+            if pl_match.method == 'fuzzy':
+                cls += ' pi-match-fuzzy'
+            badges += f' <span class="{cls}" title="{title}">{score_pct}</span>'
+        if card_techson:
+            badges += ' <span class="pi-ts-badge" title="Techson also identifies this product">Techson</span>'
+        if badges:
+            line = line.replace('</span></div>', f'</span>{badges}</div>', 1)
+        return line
+
+    def card_contacts(line, groups, state):
         # Inject evidence section before pi-contacts (within current card)
-        if current_card_data is not None and 'class="pi-contacts"' in line:
-            if current_card_data['entries']:
-                ev = ['<div class="pi-evidence">']
-                ev.append('<h4><span class="src-badge src-patlytics">Patlytics</span> Infringement Evidence</h4>')
-                ev.append('<table class="pi-ev-tbl"><thead><tr><th>Patent</th><th>Score</th><th>Category</th></tr></thead><tbody>')
-                for e in current_card_data['entries'][:6]:
-                    cls = score_class(e['score'])
-                    pat = e['patent_id']
-                    ev.append(f'<tr><td style="font-size:10px"><a href="#" onclick="goToPatent(\'{pat}\');return false" '
-                              f'style="color:var(--a);text-decoration:none">{pat}</a></td>'
-                              f'<td class="{cls}">{e["score"]:.0%}</td>'
-                              f'<td style="font-size:10px;color:var(--t3)">{esc(e["category"])}</td></tr>')
-                ev.append('</tbody></table></div>')
-                new_lines.append('\n'.join(ev))
-            current_card_data = None
-            current_card_techson = False
-
-        new_lines.append(line)
-
-    return '\n'.join(new_lines)
+        card_data = state.get('card')
+        if card_data is None:
+            return line
+        state['card'] = None
+        state['techson'] = False
+        if not card_data['entries']:
+            return line
+        ev = ['<div class="pi-evidence">']
+        ev.append('<h4><span class="src-badge src-patlytics">Patlytics</span> Infringement Evidence</h4>')
+        ev.append('<table class="pi-ev-tbl"><thead><tr><th>Patent</th><th>Score</th><th>Category</th></tr></thead><tbody>')
+        for e in card_data['entries'][:6]:
+            cls = score_class(e.score)
+            pat = e.patent_id
+            ev.append(f'<tr><td style="font-size:10px"><a href="#" onclick="goToPatent(\'{pat}\');return false" '
+                      f'style="color:var(--a);text-decoration:none">{pat}</a></td>'
+                      f'<td class="{cls}">{e.score:.0%}</td>'
+                      f'<td style="font-size:10px;color:var(--t3)">{esc(e.category)}</td></tr>')
+        ev.append('</tbody></table></div>')
+        return '\n'.join(ev) + '\n' + line
+
+    scanner.on('pi', card_start)
+    scanner.on('pi_title', card_title)
+    scanner.on('pi_contacts', card_contacts)
 
 
 # ──────────────────────────────────────────────
 # Enhance company tab product rows — full inline experience
 # ──────────────────────────────────────────────
-def enhance_company_product_rows(html_text, patlytics, techson):
+def build_product_panel(company, tr_html, resolver):
+    """Expandable detail row for one company tab product row.
+
+    A pure function of the row markup and the product's resolution, so
+    it can be rendered as an independent fragment. Extracts all data directly
+    from the row HTML (not from Products page cards).
+    """
+    prod_m = re.search(r'class="prod-link">([^<]+)</a>', tr_html)
+    prod_name = html_mod.unescape(prod_m.group(1)) if prod_m else ''
+
+    url_m = re.search(r'href="([^"]*)"[^>]*class="prod-link"', tr_html)
+    if not url_m:
+        url_m = re.search(r'class="prod-link"[^>]*href="([^"]*)"', tr_html)
+    prod_url = url_m.group(1) if url_m else ''
+
+    desc_m = re.search(r'class="prod-desc">([^<]+)</div>', tr_html)
+    desc = html_mod.unescape(desc_m.group(1)) if desc_m else ''
+
+    patent_areas = re.findall(r'data-pat-cat="([^"]*)"[^>]*>([^<]*)</a>', tr_html)
+
+    pl_data, has_techson, _ = resolver.resolve(company, prod_name)
+    safe_id = re.sub(r'[^a-zA-Z0-9]', '_', f'{company}_{prod_name}')
+
+    # -- Build detail panel (mirrors pi-body from Products page) --
+    d = []
+    d.append(f'<tr class="cpd-detail-row" id="cpd-{safe_id}" style="display:none">')
+    d.append(f'<td colspan="3"><div class="cpd-panel">')
+
+    # Description + link (like pi-desc)
+    if desc:
+        d.append(f'<p class="cpd-desc">{esc(desc)}</p>')
+    if prod_url:
+        d.append(f'<a href="{esc(prod_url)}" target="_blank" class="cpd-ext-link" '
+                 f'onclick="event.stopPropagation()">View product page &#x2197;</a>')
+
+    # Patent area tags (like pi-tags)
+    if patent_areas:
+        d.append('<div class="cpd-tags" style="margin-bottom:14px">')
+        for slug, label in patent_areas:
+            d.append(f'<a href="#" class="cpd-tag" onclick="goPatCat(this);return false" '
+                     f'data-pat-cat="{slug}">{esc(label)}</a>')
+        d.append('</div>')
+
+    # Patlytics evidence table (like pi-evidence, with Category column)
+    if pl_data and pl_data.get('entries'):
+        d.append('<div class="cpd-evidence">')
+        d.append('<h4 class="cpd-ev-h"><span class="src-badge src-patlytics">Patlytics</span> Infringement Evidence</h4>')
+        d.append('<table class="cpd-ev-tbl"><thead><tr>'
+                 '<th>Patent</th><th>Score</th><th>Category</th></tr></thead><tbody>')
+        for entry in pl_data['entries']:
+            sc = entry.score
+            cls = score_class(sc)
+            cat = entry.category
+            d.append(
+                f'<tr><td style="font-size:10px"><a href="#" onclick="goToPatent(\'{entry.patent_id}\');'
+                f'event.stopPropagation();return false" style="color:var(--a);text-decoration:none">'
+                f'{entry.patent_id}</a></td>'
+                f'<td class="{cls}">{sc:.0%}</td>'
+                f'<td style="font-size:10px;color:var(--t3)">{esc(cat)}</td></tr>')
+        d.append('</tbody></table></div>')
+    else:
+        d.append('<div class="cpd-evidence cpd-no-ev">'
+                 '<span style="font-size:11px;color:var(--t3);font-style:italic">'
+                 'No Patlytics scoring available for this product.</span></div>')
+
+    # Techson note
+    if has_techson:
+        d.append('<div class="cpd-techson-note" style="margin-top:10px">'
+                 '<span class="src-badge src-techson" style="font-size:7px">T</span> '
+                 'Independently identified by Techson as a relevant infringement target for this portfolio.</div>')
+
+    # Contacts (populated by JS from const PC)
+    d.append(f'<div class="cpd-contacts-section" style="margin-top:14px">'
+             f'<div class="cpd-contacts" id="cpd-ct-{safe_id}" '
+             f'data-product="{esc(prod_name)}"></div></div>')
+
+    d.append('</div></td></tr>')  # close cpd-panel + detail row
+    return ''.join(d)
+
+
+def enhance_company_product_rows(scanner, resolver, fragments=None):
     """Transform company tab product rows into expandable panels that mirror
     the Products page layout — description, patent area tags, Patlytics evidence
     table with category column, Techson note, and contact cards.
-    Extracts all data directly from the row HTML (not from Products page cards)."""
-    pl_lookup = build_product_patlytics_lookup(patlytics)
-    ts_product_map = build_techson_product_set(techson)
+    Registers line handlers on `scanner`; detail panels are taken from
+    `fragments` when pre-rendered (see render_fragments)."""
+    fragments = fragments or {}
 
-    lines = html_text.split('\n')
-    new_lines = []
-    current_company = None
     panel_count = 0
 
-    for line in lines:
+    def company_page(line, groups, state):
         # Track which company tab we're in
-        co_match = re.search(r'id="page-co-([^"]+)"', line)
-        if co_match:
-            slug = co_match.group(1)
-            for co in TARGET_12:
-                if co.replace('/', '-') == slug or co == slug:
-                    current_company = co
-                    break
+        slug = groups[0]
+        for co in TARGET_12:
+            if co.replace('/', '-') == slug or co == slug:
+                state['company'] = co
+                break
+        return line
 
+    def product_row(line, groups, state):
         # Process lines with product rows
-        if current_company and 'class="prod-link"' in line and '<td class="prod-indent">' in line:
+        current_company = state.get('company')
+        if current_company and 'class="prod-link"' in line:
             def replace_product_row(m):
                 nonlocal panel_count
                 tr_html = m.group(0)
@@ -1403,24 +2938,7 @@ def enhance_company_product_rows(html_text, patlytics, techson):
                     return tr_html
                 prod_name = html_mod.unescape(prod_m.group(1))
 
-                # Extract data directly from the row HTML
-                url_m = re.search(r'href="([^"]*)"[^>]*class="prod-link"', tr_html)
-                if not url_m:
-                    url_m = re.search(r'class="prod-link"[^>]*href="([^"]*)"', tr_html)
-                prod_url = url_m.group(1) if url_m else ''
-
-                desc_m = re.search(r'class="prod-desc">([^<]+)</div>', tr_html)
-                desc = html_mod.unescape(desc_m.group(1)) if desc_m else ''
-
-                patent_areas = re.findall(r'data-pat-cat="([^"]*)"[^>]*>([^<]*)</a>', tr_html)
-
-                # Conflict rating
-                conflict_m = re.search(r'class="r r-([^"]*)"[^>]*>([^<]*)</span>', tr_html)
-                conflict_label = conflict_m.group(2) if conflict_m else ''
-                conflict_cls = conflict_m.group(1) if conflict_m else ''
-
-                pl_data = find_patlytics_for_product(prod_name, current_company, pl_lookup)
-                has_techson = (current_company, prod_name) in ts_product_map
+                pl_data, has_techson, _ = resolver.resolve(current_company, prod_name)
 
                 # -- Add badges to the row --
                 badges = ''
@@ -1442,108 +2960,56 @@ def enhance_company_product_rows(html_text, patlytics, techson):
                     f'<tr class="cpd-row" onclick="toggleCpd(\'{safe_id}\')">'
                     f'<td class="prod-indent">')
 
-                # -- Build detail panel (mirrors pi-body from Products page) --
-                d = []
-                d.append(f'<tr class="cpd-detail-row" id="cpd-{safe_id}" style="display:none">')
-                d.append(f'<td colspan="3"><div class="cpd-panel">')
-
-                # Description + link (like pi-desc)
-                if desc:
-                    d.append(f'<p class="cpd-desc">{esc(desc)}</p>')
-                if prod_url:
-                    d.append(f'<a href="{esc(prod_url)}" target="_blank" class="cpd-ext-link" '
-                             f'onclick="event.stopPropagation()">View product page &#x2197;</a>')
-
-                # Patent area tags (like pi-tags)
-                if patent_areas:
-                    d.append('<div class="cpd-tags" style="margin-bottom:14px">')
-                    for slug, label in patent_areas:
-                        d.append(f'<a href="#" class="cpd-tag" onclick="goPatCat(this);return false" '
-                                 f'data-pat-cat="{slug}">{esc(label)}</a>')
-                    d.append('</div>')
-
-                # Patlytics evidence table (like pi-evidence, with Category column)
-                if pl_data and pl_data.get('entries'):
-                    d.append('<div class="cpd-evidence">')
-                    d.append('<h4 class="cpd-ev-h"><span class="src-badge src-patlytics">Patlytics</span> Infringement Evidence</h4>')
-                    d.append('<table class="cpd-ev-tbl"><thead><tr>'
-                             '<th>Patent</th><th>Score</th><th>Category</th></tr></thead><tbody>')
-                    for entry in pl_data['entries']:
-                        sc = entry['score']
-                        cls = score_class(sc)
-                        cat = entry.get('category', '')
-                        d.append(
-                            f'<tr><td style="font-size:10px"><a href="#" onclick="goToPatent(\'{entry["patent_id"]}\');'
-                            f'event.stopPropagation();return false" style="color:var(--a);text-decoration:none">'
-                            f'{entry["patent_id"]}</a></td>'
-                            f'<td class="{cls}">{sc:.0%}</td>'
-                            f'<td style="font-size:10px;color:var(--t3)">{esc(cat)}</td></tr>')
-                    d.append('</tbody></table></div>')
-                else:
-                    d.append('<div class="cpd-evidence cpd-no-ev">'
-                             '<span style="font-size:11px;color:var(--t3);font-style:italic">'
-                             'No Patlytics scoring available for this product.</span></div>')
-
-                # Techson note
-                if has_techson:
-                    d.append('<div class="cpd-techson-note" style="margin-top:10px">'
-                             '<span class="src-badge src-techson" style="font-size:7px">T</span> '
-                             'Independently identified by Techson as a relevant infringement target for this portfolio.</div>')
-
-                # Contacts (populated by JS from const PC)
-                d.append(f'<div class="cpd-contacts-section" style="margin-top:14px">'
-                         f'<div class="cpd-contacts" id="cpd-ct-{safe_id}" '
-                         f'data-product="{esc(prod_name)}"></div></div>')
-
-                d.append('</div></td></tr>')  # close cpd-panel + detail row
+                # -- Detail panel (mirrors pi-body from Products page) --
+                panel = fragments.get(('product-panel', current_company, m.group(0)))
+                if panel is None:
+                    panel = build_product_panel(current_company, m.group(0), resolver)
                 panel_count += 1
 
-                return tr_html + ''.join(d)
+                return tr_html + panel
 
             line = re.sub(
                 r'<tr><td class="prod-indent">.*?</tr>',
                 replace_product_row,
                 line)
+        return line
 
-        new_lines.append(line)
+    def report():
+        print(f"  {panel_count} expandable product panels in company tabs")
 
-    print(f"  {panel_count} expandable product panels in company tabs")
-    return '\n'.join(new_lines)
+    scanner.on('page_co', company_page)
+    scanner.on('prod_row', product_row)
+    scanner.after(report)
 
 
 # ──────────────────────────────────────────────
 # Standardize company logos across the dashboard
 # ──────────────────────────────────────────────
-def standardize_company_logos(html_text):
-    """Add co-mono icons to sidebar nav items, company tab headers,
-    and network table company cells."""
-    count = 0
-
+def add_company_logo_rules(rw):
+    """Register rewrite rules that add co-mono icons to sidebar nav items,
+    company tab headers and network table company cells."""
     # 1. Sidebar nav items — add icon before company name
     #    Pattern: <div class="nav-item" data-page="co-Google">Google <span class="b">164</span></div>
     for co in TARGET_12:
         slug = co.replace('/', '-')
         icon = co_icon(co, 16)
         # nav item
-        old_nav = f'data-page="co-{slug}">{co} '
-        new_nav = f'data-page="co-{slug}">{icon}{co} '
-        if old_nav in html_text:
-            html_text = html_text.replace(old_nav, new_nav)
-            count += 1
+        rw.literal(f'logo nav {co}', f'data-page="co-{slug}">{co} ',
+                   f'data-page="co-{slug}">{icon}{co} ', required=False)
         # Company tab header: <h2>Google</h2>
         icon_lg = co_icon(co, 24)
-        old_h2 = f'<h2>{co}</h2>'
-        new_h2 = f'<h2>{icon_lg} {co}</h2>'
-        if old_h2 in html_text:
-            html_text = html_text.replace(old_h2, new_h2)
-            count += 1
+        rw.literal(f'logo h2 {co}', f'<h2>{co}</h2>', f'<h2>{icon_lg} {co}</h2>',
+                   required=False)
 
     # 2. Network table cells: <td class="net-co">COMPANY</td>
-    for co in TARGET_12:
-        icon_sm = co_icon(co, 14)
-        old_td = f'<td class="net-co">{co}</td>'
-        new_td = f'<td class="net-co">{icon_sm} {co}</td>'
-        html_text = html_text.replace(old_td, new_td)
+    #    Cells are normalized first, so spelling variants get the target name + icon.
+    def net_cell(m):
+        co = norm_company(html_mod.unescape(m.group(1)))
+        if co not in TARGET_12:
+            return m.group(0)
+        return f'<td class="net-co">{co_icon(co, 14)} {esc(co)}</td>'
+    rw.regex('logo network table', r'<td class="net-co">([^<]+)</td>', net_cell,
+             required=False)
 
     # 3. Normalize existing co-mono icons from base dashboard (product filter buttons)
     #    The base dashboard uses different colors/letters for some companies.
@@ -1567,84 +3033,358 @@ def standardize_company_logos(html_text):
         ('background:#ed1c24;width:16px;height:16px;font-size:9px;line-height:16px">A</span>',
          'background:#ED1C24;width:16px;height:16px;font-size:9px;line-height:16px">S</span>'),
     ]
-    norm_count = 0
-    for old_str, new_str in replacements:
-        if old_str in html_text:
-            html_text = html_text.replace(old_str, new_str)
-            norm_count += 1
-
-    print(f"  {count} nav/header logos added, network table logos injected, {norm_count} old icons normalized")
-    return html_text
+    for i, (old_str, new_str) in enumerate(replacements):
+        rw.literal(f'logo icon {i}', old_str, new_str, required=False)
 
 
 # ──────────────────────────────────────────────
 # Enhance company tabs
 # ──────────────────────────────────────────────
-def enhance_company_tabs(html_text, patlytics, techson):
+def build_company_card(co, patlytics, techson, stats=None):
+    """Litigation summary card shown at the top of a company tab, from the
+    company's CompanyStats (`stats`; aggregated here when not given)."""
+    cs = stats or aggregate_companies(patlytics, techson).get(co)
+    pl_scores = [(prod, best.score, best.patent_id) for prod, best, _ in cs.products]
+    ts_patents = cs.ts_patents
+    ts_revenue = cs.ts_revenue
+    avg_q = cs.avg_quality
+    best_pat_score = cs.best_score
+
+    # Build summary card HTML
+    card = []
+    card.append(f'<div class="lit-summary-card">')
+    card.append(f'<h4>Litigation Assessment <span class="src-badge src-patlytics">Patlytics</span> <span class="src-badge src-techson">Techson</span></h4>')
+    card.append(f'<div class="lit-sum-stats">')
+    card.append(f'<div class="lit-sum-stat"><div class="lbl">Revenue Risk</div><div class="val" style="color:var(--hi)">{fmt_revenue(ts_revenue)}</div></div>')
+    card.append(f'<div class="lit-sum-stat"><div class="lbl">Top Patlytics Score</div><div class="val" style="color:{"var(--cr)" if best_pat_score >= 0.8 else "var(--hi)" if best_pat_score >= 0.5 else "var(--t3)"}">{best_pat_score:.0%}</div></div>')
+    card.append(f'<div class="lit-sum-stat"><div class="lbl">Patents Targeting</div><div class="val" style="color:var(--a)">{ts_patents}</div></div>')
+    card.append(f'<div class="lit-sum-stat"><div class="lbl">Avg Quality</div><div class="val" style="color:{"var(--gn)" if avg_q >= 6 else "var(--hi)"}">{avg_q:.1f}</div></div>')
+    card.append(f'</div>')
+
+    if pl_scores:
+        card.append(f'<table class="lit-mini-tbl"><thead><tr><th>Product</th><th>Score</th><th>Source Patent</th></tr></thead><tbody>')
+        for prod, sc, pat in pl_scores[:5]:
+            cls = score_class(sc)
+            card.append(f'<tr><td>{esc(prod)}</td><td class="{cls}">{sc:.0%}</td>'
+                        f'<td style="font-size:10px"><a href="#" onclick="goToPatent(\'{pat}\');return false" '
+                        f'style="color:var(--a);text-decoration:none">{pat}</a></td></tr>')
+        card.append(f'</tbody></table>')
+
+    card.append(f'</div>')
+    return '\n'.join(card)
+
+
+def enhance_company_tabs(doc, patlytics, techson, fragments=None, stats=None):
     """Insert litigation summary card at top of each company tab."""
+    fragments = fragments or {}
+    stats = stats or aggregate_companies(patlytics, techson)
     for co in TARGET_12:
-        slug = co.replace('/', '-')
-        # Try both formats
-        for marker_id in [co, slug]:
-            marker = f'id="pa-co-{marker_id}"'
-            if marker in html_text:
-                break
-        else:
+        node = company_page_id(doc, co)
+        if node is None:
+            continue
+        # The products table card may use either id format
+        marker_ids = (co, co.replace('/', '-'))
+        table = next((seg for seg in doc.segments(node, 'co-table')
+                      if seg.key in marker_ids), None)
+        if table is None:
             continue
 
-        # Aggregate Patlytics data for this company
-        pl_scores = []
-        for (co_norm, prod), entries in patlytics['by_product'].items():
-            if co_norm == co:
-                best = max(entries, key=lambda e: e['score'])
-                pl_scores.append((prod, best['score'], best['patent_id']))
-        pl_scores.sort(key=lambda x: -x[1])
-
-        # Aggregate Techson data
-        ts_patents = 0
-        ts_revenue = 0
-        ts_quality_sum = 0
-        for pid, td in techson.items():
-            if co in td['target_cos_norm']:
-                ts_patents += 1
-                ts_revenue += td['revenue']
-                ts_quality_sum += td['quality']
-        avg_q = ts_quality_sum / ts_patents if ts_patents else 0
-
-        best_pat_score = pl_scores[0][1] if pl_scores else 0
-
-        # Build summary card HTML
-        card = []
-        card.append(f'<div class="lit-summary-card">')
-        card.append(f'<h4>Litigation Assessment <span class="src-badge src-patlytics">Patlytics</span> <span class="src-badge src-techson">Techson</span></h4>')
-        card.append(f'<div class="lit-sum-stats">')
-        card.append(f'<div class="lit-sum-stat"><div class="lbl">Revenue Risk</div><div class="val" style="color:var(--hi)">{fmt_revenue(ts_revenue)}</div></div>')
-        card.append(f'<div class="lit-sum-stat"><div class="lbl">Top Patlytics Score</div><div class="val" style="color:{"var(--cr)" if best_pat_score >= 0.8 else "var(--hi)" if best_pat_score >= 0.5 else "var(--t3)"}">{best_pat_score:.0%}</div></div>')
-        card.append(f'<div class="lit-sum-stat"><div class="lbl">Patents Targeting</div><div class="val" style="color:var(--a)">{ts_patents}</div></div>')
-        card.append(f'<div class="lit-sum-stat"><div class="lbl">Avg Quality</div><div class="val" style="color:{"var(--gn)" if avg_q >= 6 else "var(--hi)"}">{avg_q:.1f}</div></div>')
-        card.append(f'</div>')
-
-        if pl_scores:
-            card.append(f'<table class="lit-mini-tbl"><thead><tr><th>Product</th><th>Score</th><th>Source Patent</th></tr></thead><tbody>')
-            for prod, sc, pat in pl_scores[:5]:
-                cls = score_class(sc)
-                card.append(f'<tr><td>{esc(prod)}</td><td class="{cls}">{sc:.0%}</td>'
-                            f'<td style="font-size:10px"><a href="#" onclick="goToPatent(\'{pat}\');return false" '
-                            f'style="color:var(--a);text-decoration:none">{pat}</a></td></tr>')
-            card.append(f'</tbody></table>')
-
-        card.append(f'</div>')
-        card_html = '\n'.join(card)
+        card_html = fragments.get(('company-card', co))
+        if card_html is None:
+            card_html = build_company_card(co, patlytics, techson, stats.get(co))
 
         # Insert before the products table card
-        # Find the div with this marker ID (may have style attr after)
-        marker_pattern = re.compile(
-            r'(<div class="card" ' + re.escape(marker) + r'[^>]*>)')
-        m = marker_pattern.search(html_text)
-        if m:
-            html_text = html_text[:m.start()] + card_html + '\n' + html_text[m.start():]
+        doc.splice(node).insert(table.start, card_html + '\n')
+
+
+# ──────────────────────────────────────────────
+# Parallel fragment rendering
+# ──────────────────────────────────────────────
+# The litigation page, company summary cards, patent detail panels and
+# company product panels are pure functions of the loaded Patlytics/Techson
+# data (plus, for product panels, the base row markup). They are rendered up
+# front as independent fragments — across a process pool when jobs > 1 — and
+# looked up by fragment ID while the pages are assembled; anything not
+# pre-rendered is built inline as before. Fragment IDs are tuples:
+#   ('litigation',)  ('company-card', co)  ('patent-detail', pid_n)
+#   ('product-panel', co, row_html)  ('category-overview', section_counts)
+#
+# Rendered fragments also persist across builds in a content-addressed store
+# under .build_cache/: each fragment is keyed by a hash of exactly the data
+# it is rendered from (FRAGMENT_INPUTS), and the store itself by
+# FRAGMENT_VERSION plus the shared display tables. An edit — one score, one
+# PATENT_DESCRIPTIONS entry — re-renders only the fragments that read it.
+FRAGMENT_VERSION = 1  # bump whenever a fragment renderer's output changes
+_FRAGMENT_CTX = {}
+
+
+def _init_fragment_context(patlytics, techson, resolver=None, company_stats=None):
+    _FRAGMENT_CTX.clear()
+    _FRAGMENT_CTX.update(patlytics=patlytics, techson=techson)
+    if resolver is not None:
+        _FRAGMENT_CTX['resolver'] = resolver
+    if company_stats is not None:
+        _FRAGMENT_CTX['company_stats'] = company_stats
+
 
-    return html_text
+def _init_fragment_worker(matrix_state, techson, match_state=None):
+    """Process-pool initializer: rebuild the shared data once per worker."""
+    _init_fragment_context(ScoreMatrix.from_state(matrix_state), techson)
+    if match_state is not None:
+        _FRAGMENT_CTX['match_table'] = MatchTable.from_state(match_state)
+
+
+def _product_resolver():
+    """Product resolver for the current context: the build's own when
+    rendering in-process, otherwise built on first use."""
+    if 'resolver' not in _FRAGMENT_CTX:
+        _FRAGMENT_CTX['resolver'] = ProductResolver(_FRAGMENT_CTX['patlytics'], _FRAGMENT_CTX['techson'],
+                                                    _FRAGMENT_CTX.get('match_table'))
+    return _FRAGMENT_CTX['resolver']
+
+
+def _company_stats():
+    """CompanyTable for the current context: the build's own when rendering
+    in-process, otherwise aggregated on first use."""
+    if 'company_stats' not in _FRAGMENT_CTX:
+        _FRAGMENT_CTX['company_stats'] = aggregate_companies(_FRAGMENT_CTX['patlytics'],
+                                                             _FRAGMENT_CTX['techson'])
+    return _FRAGMENT_CTX['company_stats']
+
+
+def _render_litigation(patlytics, techson):
+    return build_litigation_page(patlytics, techson, _company_stats())
+
+
+def _render_company_card(co, patlytics, techson):
+    return build_company_card(co, patlytics, techson, _company_stats().get(co))
+
+
+def _render_patent_detail(pid_n, patlytics, techson):
+    return build_patent_detail(pid_n, techson.get(pid_n), patlytics.patent_entries(pid_n))
+
+
+def _render_product_panel(co, row_html, patlytics, techson):
+    return build_product_panel(co, row_html, _product_resolver())
+
+
+def _render_category_overview(section_counts, patlytics, techson):
+    return build_category_overview(dict(section_counts))
+
+
+# fragment kind -> renderer(*frag_id[1:], patlytics, techson)
+FRAGMENT_RENDERERS = {
+    'litigation': _render_litigation,
+    'company-card': _render_company_card,
+    'patent-detail': _render_patent_detail,
+    'product-panel': _render_product_panel,
+    'category-overview': _render_category_overview,
+}
+
+
+def _litigation_inputs(patlytics, techson):
+    return [(pid, patlytics.patent_entries(pid)) for pid in sorted(patlytics.patents)], techson
+
+
+def _company_card_inputs(co, patlytics, techson):
+    return _company_stats().get(co)
+
+
+def _patent_detail_inputs(pid_n, patlytics, techson):
+    return techson.get(pid_n), patlytics.patent_entries(pid_n), PATENT_DESCRIPTIONS.get(pid_n, '')
+
+
+def _product_panel_inputs(co, row_html, patlytics, techson):
+    prod_m = re.search(r'class="prod-link">([^<]+)</a>', row_html)
+    prod_name = html_mod.unescape(prod_m.group(1)) if prod_m else ''
+    return _product_resolver().resolve(co, prod_name)[:2]  # the panel ignores match confidence
+
+
+def _category_overview_inputs(section_counts, patlytics, techson):
+    return CATEGORY_PATLYTICS_MAP
+
+
+# fragment kind -> inputs(*frag_id[1:], patlytics, techson): everything the
+# renderer reads beyond the fragment ID itself and the store-wide tables
+FRAGMENT_INPUTS = {
+    'litigation': _litigation_inputs,
+    'company-card': _company_card_inputs,
+    'patent-detail': _patent_detail_inputs,
+    'product-panel': _product_panel_inputs,
+    'category-overview': _category_overview_inputs,
+}
+
+
+def fragment_store_key():
+    """Cache key of the fragment store: renderer version + shared tables."""
+    salt = [str(FRAGMENT_VERSION), json.dumps(COMPANY_NORM, sort_keys=True),
+            json.dumps(TARGET_12), json.dumps(COMPANY_COLORS, sort_keys=True)]
+    return hashlib.sha256('\0'.join(salt).encode()).hexdigest()[:32]
+
+
+def fragment_key(frag_id, patlytics, techson):
+    """Content hash of a fragment's ID and inputs (repr is value-based and
+    stable for the tuples, namedtuples, dicts and floats involved)."""
+    inputs = FRAGMENT_INPUTS[frag_id[0]](*frag_id[1:], patlytics, techson)
+    return hashlib.sha256(repr((frag_id, inputs)).encode()).hexdigest()[:32]
+
+
+def _render_fragment(frag_id):
+    """Process-pool entry point: render one fragment from the shared context."""
+    render = FRAGMENT_RENDERERS[frag_id[0]]
+    return render(*frag_id[1:], _FRAGMENT_CTX['patlytics'], _FRAGMENT_CTX['techson'])
+
+
+def company_product_panel_ids(doc):
+    """Fragment IDs for every product row in the company tab product tables."""
+    ids = []
+    for co in TARGET_12:
+        node = company_page_id(doc, co)
+        if node is None:
+            continue
+        text = doc[node]
+        for seg in doc.segments(node, 'co-table'):
+            for m in re.finditer(r'<tr><td class="prod-indent">.*?</tr>', text[seg.start:seg.end]):
+                if 'class="prod-link"' in m.group(0):
+                    ids.append(('product-panel', co, m.group(0)))
+    return ids
+
+
+def render_fragments(frag_ids, patlytics, techson, resolver=None, company_stats=None,
+                     jobs=None, cache=True):
+    """Render fragments, returning {frag_id: html}.
+
+    With `cache`, fragments whose content key is in the fragment store are
+    reused. The rest are spread over up to `jobs` worker processes (default =
+    CPU count, 1 = serial); each worker receives the Patlytics matrix and
+    Techson records once, through the pool initializer. In-process rendering
+    and cache keys resolve products through `resolver` (the build's
+    ProductResolver) and read per-company figures from `company_stats` (its
+    CompanyTable) when given."""
+    frag_ids = list(dict.fromkeys(frag_ids))
+    _init_fragment_context(patlytics, techson, resolver, company_stats)
+    rendered = {}
+    keys = {}
+    if cache:
+        store_key = fragment_store_key()
+        store = cache_get('fragments', 'html', store_key) or {}
+        for frag_id in frag_ids:
+            keys[frag_id] = key = fragment_key(frag_id, patlytics, techson)
+            if key in store:
+                rendered[frag_id] = store[key]
+    misses = [frag_id for frag_id in frag_ids if frag_id not in rendered]
+
+    jobs = min(jobs or os.cpu_count() or 1, len(misses))
+    if jobs > 1:
+        chunksize = max(1, len(misses) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_fragment_worker,
+                                 initargs=(patlytics.state(), techson,
+                                           resolver.table.state() if resolver else None)) as pool:
+            rendered.update(zip(misses, pool.map(_render_fragment, misses, chunksize=chunksize)))
+    else:
+        rendered.update((frag_id, _render_fragment(frag_id)) for frag_id in misses)
+    _FRAGMENT_CTX.clear()
+
+    if cache:
+        fresh = {keys[frag_id]: rendered[frag_id] for frag_id in frag_ids}
+        if misses or fresh.keys() != store.keys():
+            cache_put('fragments', 'html', store_key, fresh)
+        missed = set(misses)
+        totals = defaultdict(lambda: [0, 0])  # kind -> [hits, total]
+        for frag_id in frag_ids:
+            totals[frag_id[0]][0] += frag_id not in missed
+            totals[frag_id[0]][1] += 1
+        print("  fragment cache: " + ", ".join(
+            f"{kind} {hits}/{total}" for kind, (hits, total) in totals.items()))
+    return {frag_id: rendered[frag_id] for frag_id in frag_ids}
+
+
+# ──────────────────────────────────────────────
+# Single-pass HTML rewriting
+# ──────────────────────────────────────────────
+class HtmlRewriter:
+    """Collects literal and regex substitutions and applies them in one pass.
+
+    Every rule is matched against the same input text; overlapping matches
+    are resolved leftmost-first (ties go to the rule registered first) and
+    the output string is assembled once. Replacement text is never
+    re-scanned, so rules cannot cascade into each other."""
+
+    def __init__(self):
+        self.rules = []   # (name, pattern, repl, required); pattern is str or compiled regex
+        self.hits = {}
+
+    def literal(self, name, old, new, required=True):
+        self.rules.append((name, old, new, required))
+
+    def regex(self, name, pattern, repl, flags=0, required=True):
+        """`repl` is a template string (\\1, \\g<name>) or a callable(match)."""
+        self.rules.append((name, re.compile(pattern, flags), repl, required))
+
+    def apply(self, text):
+        hits = [0] * len(self.rules)
+        result = self._apply(text, hits)
+        self.hits = {rule[0]: n for rule, n in zip(self.rules, hits)}
+        return result
+
+    def apply_chunks(self, chunks, write):
+        """Apply the rules to each chunk independently, passing each result
+        to write(). Hits accumulate across chunks; rules must not need to
+        match across chunk boundaries (page / script node edges)."""
+        hits = [0] * len(self.rules)
+        for chunk in chunks:
+            write(self._apply(chunk, hits))
+        self.hits = {rule[0]: n for rule, n in zip(self.rules, hits)}
+
+    def _apply(self, text, hits):
+        spans = []  # (start, rule index, end, replacement)
+        for idx, (_, pat, repl, _) in enumerate(self.rules):
+            if isinstance(pat, str):
+                pos, n = text.find(pat), len(pat)
+                while pos >= 0 and n:
+                    spans.append((pos, idx, pos + n, repl))
+                    pos = text.find(pat, pos + n)
+            else:
+                for m in pat.finditer(text):
+                    new = repl(m) if callable(repl) else m.expand(repl)
+                    spans.append((m.start(), idx, m.end(), new))
+        spans.sort(key=lambda sp: (sp[0], sp[1]))
+
+        out, last = [], 0
+        for start, idx, end, new in spans:
+            if start < last:
+                continue
+            out.append(text[last:start])
+            out.append(new)
+            last = end
+            hits[idx] += 1
+        out.append(text[last:])
+        return ''.join(out)
+
+    def report(self):
+        total = sum(self.hits.values())
+        print(f"  {len(self.rules)} rewrite rules, {total} substitutions in one pass")
+        for name, _, _, required in self.rules:
+            if required and not self.hits.get(name):
+                print(f"  WARNING: rewrite rule '{name}' matched nothing")
+
+
+def write_dashboard(doc, rw, path):
+    """Stream the assembled document to `path`, node by node.
+
+    Each chunk goes through the rewrite rules and straight into a buffered
+    file, and is released as soon as it is written, so no whole-document
+    string is ever built. The file is written beside `path` and moved into
+    place at the end. Returns the number of characters written."""
+    tmp = path + '.tmp'
+    written = 0
+    with open(tmp, 'w', buffering=1 << 20) as f:
+        def write(text):
+            nonlocal written
+            written += f.write(text)
+        rw.apply_chunks(doc.drain(), write)
+    os.replace(tmp, path)
+    return written
 
 
 # ──────────────────────────────────────────────
@@ -1830,206 +3570,288 @@ document.querySelectorAll('.pi-sort-btn').forEach(function(btn) {
 """
 
 
+# ──────────────────────────────────────────────
+# Build profiler (--profile)
+# ──────────────────────────────────────────────
+_REGEX_CALL_RE = re.compile(r"<method '(?:search|match|fullmatch|finditer|findall|sub|subn|split)' "
+                            r"of 're\.Pattern' objects>")
+
+
+class BuildProfiler:
+    """Per-stage wall/CPU time, tracemalloc peak, regex calls and output size.
+
+    When disabled, stage() is a no-op, so main() wraps its steps
+    unconditionally. Regex executions are counted by running each stage
+    under cProfile and summing calls to re.Pattern methods (re.search() and
+    friends go through them too); work done in pool workers is not seen.
+    cProfile and tracemalloc slow the build, so the timings are for ranking
+    stages against each other rather than as absolute numbers."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stages = []
+        self.size_fn = None  # () -> current output size in characters
+        if enabled:
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        size0 = self.size_fn() if self.size_fn else 0
+        mem0, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        prof = cProfile.Profile()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        prof.enable()
+        try:
+            yield
+        finally:
+            prof.disable()
+            wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+            mem1, peak = tracemalloc.get_traced_memory()
+            regex_calls = sum(stat[1] for (_, _, func), stat in pstats.Stats(prof).stats.items()
+                              if _REGEX_CALL_RE.fullmatch(func))
+            self.stages.append({
+                'stage': name,
+                'wall_s': round(wall, 4),
+                'cpu_s': round(cpu, 4),
+                'alloc_peak_bytes': peak - mem0,
+                'alloc_net_bytes': mem1 - mem0,
+                'regex_calls': regex_calls,
+                'output_delta_chars': (self.size_fn() if self.size_fn else 0) - size0,
+            })
+
+    def report(self, path):
+        """Write the JSON report to `path` and print stages by wall time."""
+        if not self.enabled:
+            return
+        tracemalloc.stop()
+        total = {key: sum(st[key] for st in self.stages)
+                 for key in ('wall_s', 'cpu_s', 'regex_calls', 'output_delta_chars')}
+        total['wall_s'] = round(total['wall_s'], 4)
+        total['cpu_s'] = round(total['cpu_s'], 4)
+        with open(path, 'w') as f:
+            json.dump({'stages': self.stages, 'total': total}, f, indent=2)
+
+        print(f"\nBuild profile ({path}):")
+        print(f"  {'stage':<22} {'wall s':>8} {'cpu s':>8} {'peak MB':>8} {'net MB':>8} "
+              f"{'regex':>8} {'output Δ':>12}")
+        for st in sorted(self.stages, key=lambda st: -st['wall_s']):
+            print(f"  {st['stage']:<22} {st['wall_s']:>8.3f} {st['cpu_s']:>8.3f} "
+                  f"{st['alloc_peak_bytes'] / 1e6:>8.1f} {st['alloc_net_bytes'] / 1e6:>8.1f} "
+                  f"{st['regex_calls']:>8,} {st['output_delta_chars']:>+12,}")
+        print(f"  {'total':<22} {total['wall_s']:>8.3f} {total['cpu_s']:>8.3f} "
+              f"{'':>8} {'':>8} {total['regex_calls']:>8,} {total['output_delta_chars']:>+12,}")
+
+
 # ──────────────────────────────────────────────
 # Main orchestrator
 # ──────────────────────────────────────────────
-def main():
-    print("Loading Patlytics data...")
-    patlytics = load_patlytics()
-    print(f"  {len(patlytics['by_patent'])} patents, {len(patlytics['by_product'])} products")
-
-    print("Loading Techson data...")
-    techson = load_techson()
-    print(f"  {len(techson)} patents")
-
-    print("Reading index.html...")
-    with open(INPUT_HTML, 'r') as f:
-        html_text = f.read()
-
-    # 1. Update title
-    html_text = html_text.replace(
-        '<title>UltronAI \u2014 Patent Portfolio Dashboard</title>',
-        '<title>UltronAI \u2014 Patent Intelligence Dashboard</title>')
-
-    # Remove 'active' class from patents page (litigation page will be default)
-    html_text = html_text.replace(
-        'class="page active" id="page-patents"',
-        'class="page" id="page-patents"')
-
-    # Update sidebar subtitle
-    html_text = html_text.replace(
-        '<p>Patent Portfolio Dashboard</p>',
-        '<p>Patent Intelligence Dashboard</p>')
-
-    # Remove 'active' from the patents nav item (litigation will be default)
-    html_text = html_text.replace(
-        '<div class="nav-item active" data-page="patents">',
-        '<div class="nav-item" data-page="patents">')
-
-    # 2. Reorganize patent categories
-    print("Reorganizing patent categories...")
-    html_text = reorganize_patents(html_text)
-
-    # 2b. Remap old category cross-references (product card links to patent categories)
-    print("Remapping category cross-references...")
-    # Cosine Embedding → Neural Network Architecture
-    html_text = html_text.replace(
-        'data-pat-cat="cosine-embedding-similarity"',
-        'data-pat-cat="neural-network-architecture"')
-    html_text = html_text.replace(
-        '>Cosine Embedding</a>',
-        '>Neural Network</a>')
-    # Retail / Product AI → Retail: Product Detection (the broader retail category)
-    html_text = html_text.replace(
-        'data-pat-cat="retail-product-ai"',
-        'data-pat-cat="retail-product-detection"')
-    html_text = html_text.replace(
-        '>Retail/Product AI</a>',
-        '>Retail: Product Detection</a>')
-    remap_count = 0
-    for old in ['cosine-embedding-similarity', 'retail-product-ai']:
-        if old in html_text:
-            print(f"  WARNING: '{old}' still present after remap")
-        else:
-            remap_count += 1
-    print(f"  Remapped {remap_count}/2 old categories")
-
-    # 3. Inject CSS before </style>
-    print("Injecting CSS...")
-    html_text = html_text.replace('</style>', f'{NEW_CSS}\n</style>')
-
-    # 4. Build Litigation page
-    print("Building Litigation page...")
-    lit_page_html = build_litigation_page(patlytics, techson)
-
-    # 5. Build JS data constants
-    print("Building JS data constants...")
-    # Techson constant (by patent ID)
-    ts_js = {}
-    for pid, td in techson.items():
-        ts_js[pid] = {
-            'q': td['quality'], 'rev': td['revenue'],
-            'b': td['bundle_no'], 'bt': td['bundle_title'],
-            'st': td['status'], 'exp': td['expiration'],
-            'cos': list(set(td['target_cos_norm'])),
-        }
-    ts_json = json.dumps(ts_js, separators=(',', ':'))
-
-    # Patlytics constant (by patent ID — top scores only)
-    pl_js = {}
-    for pid, entries in patlytics['by_patent'].items():
-        sorted_e = sorted(entries, key=lambda e: -e['score'])[:15]
-        pl_js[pid] = [{'c': e['co_norm'], 'p': e['prod'],
-                        's': e['score'], 'd': e['docs']}
-                       for e in sorted_e]
-    pl_json = json.dumps(pl_js, separators=(',', ':'))
-
-    # 6. Enhance patent rows
-    print("Enhancing patent rows...")
-    html_text = enhance_patent_rows(html_text, patlytics, techson)
-
-    # 7. Enhance product cards
-    print("Enhancing product cards...")
-    html_text = enhance_product_cards(html_text, patlytics, techson)
-
-    # 7b. Add sort buttons to product toolbar
-    sort_buttons = ('<div class="pi-sort-wrap"><label>Sort</label>'
-                    '<button class="pi-sort-btn active" data-sort="default">Relevance</button>'
-                    '<button class="pi-sort-btn" data-sort="patlytics">Patlytics</button>'
-                    '<button class="pi-sort-btn" data-sort="techson">Techson</button>'
-                    '</div>')
-    html_text = html_text.replace(
-        '<input class="search-input pi-search"',
-        f'{sort_buttons}<input class="search-input pi-search"')
-
-    # 7c. Enhance company tab product rows with Patlytics/Techson badges
-    print("Enhancing company tab product rows...")
-    html_text = enhance_company_product_rows(html_text, patlytics, techson)
-
-    # 8. Enhance company tabs
-    print("Enhancing company tabs...")
-    html_text = enhance_company_tabs(html_text, patlytics, techson)
-
-    # 9. Insert Litigation page into HTML
-    # Find the first <div class="page" and insert before it
-    first_page = re.search(r'<div class="page"', html_text)
-    if first_page:
-        html_text = html_text[:first_page.start()] + lit_page_html + '\n' + html_text[first_page.start():]
-
-    # 10. Update sidebar navigation — merge Targets + Patents under one Litigation group
-    # Remove the standalone Patents nav group
-    html_text = re.sub(
-        r'<div class="nav-grp ng-pat"><div class="nav-sec">PATENTS</div>\s*'
-        r'<div class="nav-item" data-page="patents">[^<]*</div></div>\s*',
-        '',
-        html_text)
-    # Insert combined Litigation group before Products
-    nav_lit = ('<div class="nav-grp ng-lit"><div class="nav-sec">Litigation</div>\n'
-               '<div class="nav-item" data-page="litigation">Targets</div>\n'
-               '<div class="nav-item" data-page="patents">Patents</div>\n</div>\n')
-    html_text = html_text.replace(
-        '<div class="nav-grp ng-prod">',
-        f'{nav_lit}<div class="nav-grp ng-prod">')
-
-    # 10b. Standardize company logos across the dashboard
-    print("Standardizing company logos...")
-    html_text = standardize_company_logos(html_text)
-
-    # 11. Update JS P array — prepend 'litigation' so page-litigation is found
-    html_text = html_text.replace(
-        "const P=['patents'",
-        "const P=['litigation','patents'")
-
-    # 12. Update JS T dict — add litigation title
-    html_text = html_text.replace(
-        "const T={'patents'",
-        "const T={'litigation':'Litigation Targets','patents'")
-
-    # 13. Inject JS data + functions before the existing const PC
-    js_inject = f'\nconst TS = {ts_json};\nconst PL = {pl_json};\n{NEW_JS}\n'
-    pc_match = re.search(r'const PC\s*=\s*\{', html_text)
-    if pc_match:
-        html_text = html_text[:pc_match.start()] + js_inject + html_text[pc_match.start():]
-
-    # 14. Add category overview + legend + filter bar to Patents page
-    print("Adding category overview and filters...")
-    cat_overview_html = build_category_overview()
-
-    pat_filter_html = """<div class="pat-filters">
-<select id="pat-q-filter" class="pat-filter-sel" onchange="applyPatFilters()">
-<option value="all">All Quality</option>
-<option value="high">High (7-9)</option>
-<option value="mid">Medium (4-6)</option>
-<option value="low">Low (2-3)</option>
-</select>
-<select id="pat-s-filter" class="pat-filter-sel" onchange="applyPatFilters()">
-<option value="all">All Status</option>
-<option value="Active">Active</option>
-<option value="Pending">Pending</option>
-</select>
-</div>"""
+def parse_args():
+    ap = argparse.ArgumentParser(description='Build the litigation dashboard (index.html).')
+    ap.add_argument('--jobs', '-j', type=int, default=None,
+                    help='worker processes for Patlytics parsing and fragment rendering '
+                         '(default: CPU count, 1 = serial)')
+    ap.add_argument('--no-cache', dest='cache', action='store_false',
+                    help='ignore and do not update the parsed-source cache (.build_cache/)')
+    ap.add_argument('--incremental', action='store_true',
+                    help='patch the Patlytics matrix from the last build manifest, '
+                         'parsing only new or changed workbooks')
+    ap.add_argument('--profile', nargs='?', const=PROFILE_FILE, default=None, metavar='JSON',
+                    help='profile every build stage (wall/CPU time, allocation peak, regex calls, '
+                         f'output size) and write a JSON report (default: {os.path.basename(PROFILE_FILE)})')
+    return ap.parse_args()
 
-    # Insert after the stats grid on patents page, before first pat-section
-    patents_page_match = re.search(r'id="page-patents"', html_text)
-    if patents_page_match:
-        pat_sec_match = re.search(r'<div class="pat-section"', html_text[patents_page_match.start():])
-        if pat_sec_match:
-            insert_pos = patents_page_match.start() + pat_sec_match.start()
-            insert_block = cat_overview_html + '\n' + pat_filter_html + '\n'
-            html_text = html_text[:insert_pos] + insert_block + html_text[insert_pos:]
 
-    # 15. Write output
-    print(f"Writing {OUTPUT_HTML}...")
-    with open(OUTPUT_HTML, 'w') as f:
-        f.write(html_text)
+def main():
+    args = parse_args()
+    prof = BuildProfiler(enabled=args.profile is not None)
+
+    with prof.stage('load patlytics'):
+        print("Loading Patlytics data...")
+        patlytics = load_patlytics(jobs=args.jobs, cache=args.cache,
+                                   incremental=args.incremental)
+        print(f"  {patlytics.n_patents} patents, {patlytics.n_products} products")
+
+    with prof.stage('load techson'):
+        print("Loading Techson data...")
+        techson = load_techson(cache=args.cache)
+        print(f"  {len(techson)} patents")
+
+    with prof.stage('read index'):
+        print("Reading index.html...")
+        with open(INPUT_HTML, 'r') as f:
+            doc = DashboardIndex(f.read())
+        written = None  # characters written, once the document is streamed out
+        prof.size_fn = lambda: doc.size() if written is None else written
+        print(f"  {len(doc.nodes)} page/script nodes indexed")
+
+    # 1. Register every document-wide substitution up front; they are applied
+    #    in a single pass once the structural enhancements are done (step 10).
+    with prof.stage('rewrite rules'):
+        rw = HtmlRewriter()
+        rw.literal('title',
+                   '<title>UltronAI \u2014 Patent Portfolio Dashboard</title>',
+                   '<title>UltronAI \u2014 Patent Intelligence Dashboard</title>')
+        # Update sidebar subtitle
+        rw.literal('sidebar subtitle',
+                   '<p>Patent Portfolio Dashboard</p>',
+                   '<p>Patent Intelligence Dashboard</p>')
+
+        # Remap old category cross-references (product card links to patent categories)
+        # Cosine Embedding → Neural Network Architecture
+        rw.literal('remap cosine-embedding slug',
+                   'data-pat-cat="cosine-embedding-similarity"',
+                   'data-pat-cat="neural-network-architecture"')
+        rw.literal('remap cosine-embedding label',
+                   '>Cosine Embedding</a>', '>Neural Network</a>', required=False)
+        # Retail / Product AI → Retail: Product Detection (the broader retail category)
+        rw.literal('remap retail-product-ai slug',
+                   'data-pat-cat="retail-product-ai"',
+                   'data-pat-cat="retail-product-detection"')
+        rw.literal('remap retail-product-ai label',
+                   '>Retail/Product AI</a>', '>Retail: Product Detection</a>', required=False)
+
+        # Inject CSS before </style>
+        rw.literal('inject CSS', '</style>', f'{NEW_CSS}\n</style>')
+
+        # Add sort buttons to product toolbar
+        sort_buttons = ('<div class="pi-sort-wrap"><label>Sort</label>'
+                        '<button class="pi-sort-btn active" data-sort="default">Relevance</button>'
+                        '<button class="pi-sort-btn" data-sort="patlytics">Patlytics</button>'
+                        '<button class="pi-sort-btn" data-sort="techson">Techson</button>'
+                        '</div>')
+        rw.literal('product sort buttons',
+                   '<input class="search-input pi-search"',
+                   f'{sort_buttons}<input class="search-input pi-search"')
+
+        # Update sidebar navigation — merge Targets + Patents under one Litigation group.
+        # Remove the standalone Patents nav group (its item is still 'active' in the base)
+        rw.regex('remove patents nav group',
+                 r'<div class="nav-grp ng-pat"><div class="nav-sec">PATENTS</div>\s*'
+                 r'<div class="nav-item(?: active)?" data-page="patents">[^<]*</div></div>\s*',
+                 '')
+        # Insert combined Litigation group before Products
+        nav_lit = ('<div class="nav-grp ng-lit"><div class="nav-sec">Litigation</div>\n'
+                   '<div class="nav-item" data-page="litigation">Targets</div>\n'
+                   '<div class="nav-item" data-page="patents">Patents</div>\n</div>\n')
+        rw.literal('litigation nav group',
+                   '<div class="nav-grp ng-prod">',
+                   f'{nav_lit}<div class="nav-grp ng-prod">')
+
+        # Standardize company logos across the dashboard
+        add_company_logo_rules(rw)
+
+        # Update JS P array — prepend 'litigation' so page-litigation is found
+        rw.literal('JS page list', "const P=['patents'", "const P=['litigation','patents'")
+        # Update JS T dict — add litigation title
+        rw.literal('JS page titles', "const T={'patents'",
+                   "const T={'litigation':'Litigation Targets','patents'")
+
+    # 2. Reorganize patent categories and render the Patents page from the
+    #    portfolio records (not active — the litigation page is the default)
+    with prof.stage('portfolio'):
+        print("Reorganizing patent categories...")
+        portfolio = organize_portfolio(load_portfolio(doc))
+
+    # 3. Render independent fragments — Litigation page, company cards,
+    #    patent detail panels, company product panels — across the pool
+    with prof.stage('fragments'):
+        print("Rendering fragments...")
+        frag_ids = [('litigation',)]
+        frag_ids += [('company-card', co) for co in TARGET_12 if company_page_id(doc, co)]
+        frag_ids += [('patent-detail', p.key)
+                     for *_, members in portfolio for p in members if p.url]
+        frag_ids += company_product_panel_ids(doc)
+        frag_ids.append(('category-overview', portfolio_section_counts(portfolio)))
+        match_table = MatchTable(MATCH_TABLE_FILE)
+        resolver = ProductResolver(patlytics, techson, match_table)
+        company_stats = aggregate_companies(patlytics, techson)
+        fragments = render_fragments(frag_ids, patlytics, techson, resolver, company_stats,
+                                     jobs=args.jobs, cache=args.cache)
+        print(f"  {len(fragments)} fragments rendered")
+        lit_page_html = fragments[('litigation',)]
+
+    # 4. Build JS data constants
+    with prof.stage('js constants'):
+        print("Building JS data constants...")
+        # Techson constant (by patent ID)
+        ts_js = {}
+        for pid, td in techson.items():
+            ts_js[pid] = {
+                'q': td.quality, 'rev': td.revenue,
+                'b': td.bundle_no, 'bt': td.bundle_title,
+                'st': td.status, 'exp': td.expiration,
+                'cos': list(set(td.target_cos_norm)),
+            }
+        ts_json = json.dumps(ts_js, separators=(',', ':'))
+
+        # Patlytics constant (by patent ID — top scores only)
+        pl_js = {}
+        for pid in patlytics.patents:
+            pl_js[pid] = [{'c': e.co_norm, 'p': e.prod, 's': e.score, 'd': e.docs}
+                          for e in patlytics.patent_entries(pid, 15)]
+        pl_json = json.dumps(pl_js, separators=(',', ':'))
+
+    # 5. Render Patents page with Techson/Patlytics badges and details
+    with prof.stage('patents page'):
+        print("Rendering patents page...")
+        if 'page-patents' in doc:
+            doc['page-patents'] = render_patents_page(portfolio, patlytics, techson, fragments)
+
+    # 6. Enhance product cards and company tab product rows with
+    #    Patlytics/Techson badges — one shared line traversal of the pages
+    with prof.stage('line enhancers'):
+        print("Enhancing product cards and company tab product rows...")
+        scanner = LineScanner()
+        enhance_product_cards(scanner, resolver)
+        enhance_company_product_rows(scanner, resolver, fragments)
+        scanner.run(doc)
+        print(f"  {len(resolver)} products resolved ({resolver.reused} lookups reused)")
+        saved = match_table.save(MATCH_REVIEW_FILE)
+        review = match_table.review()
+        print(f"  match table: {len(match_table)} links, {len(match_table.new)} new"
+              + (f", {len(review)} for review in {os.path.basename(MATCH_REVIEW_FILE)}" if review else '')
+              + ('' if saved else ' (unchanged)'))
+
+    # 7. Enhance company tabs
+    with prof.stage('company tabs'):
+        print("Enhancing company tabs...")
+        enhance_company_tabs(doc, patlytics, techson, fragments, company_stats)
+
+    # 8. Insert Litigation page ahead of the first page
+    with prof.stage('litigation page'):
+        pages = doc.ids('page-')
+        if pages:
+            doc.insert_before(pages[0], lit_page_html + '\n')
+
+    # 9. Inject JS data + functions before the existing const PC
+    with prof.stage('js inject'):
+        js_inject = f'\nconst TS = {ts_json};\nconst PL = {pl_json};\n{NEW_JS}\n'
+        for node in doc.ids('script-'):
+            pc_match = re.search(r'const PC\s*=\s*\{', doc[node])
+            if pc_match:
+                doc.splice(node).insert(pc_match.start(), js_inject)
+                break
+
+    # 10. Stream the document to disk, applying all registered substitutions
+    #     in the same pass
+    with prof.stage('write'):
+        print(f"Writing {OUTPUT_HTML}...")
+        del fragments, ts_json, pl_json, js_inject  # already assembled into the nodes
+        written = write_dashboard(doc, rw, OUTPUT_HTML)
+    rw.report()
 
     # Stats
     print(f"\nDone! Output: {OUTPUT_HTML}")
     print(f"  File size: {os.path.getsize(OUTPUT_HTML):,} bytes")
-    print(f"  Patlytics: {len(patlytics['by_patent'])} patents, {len(patlytics['by_product'])} products")
+    print(f"  Patlytics: {patlytics.n_patents} patents, {patlytics.n_products} products")
     print(f"  Techson: {len(techson)} patents")
-    total_rev = sum(td['revenue'] for td in techson.values())
+    total_rev = sum(td.revenue for td in techson.values())
     print(f"  Total revenue risk: {fmt_revenue(total_rev)}")
+    prof.report(args.profile)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,82 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import build_litigation_dashboard as bld
+
+
+@pytest.mark.parametrize('name, canonical', [
+    ('Google LLC', 'Google'),
+    ('Meta Platforms, Inc.', 'Meta'),
+    ('Amazon Web Services', 'Amazon'),
+    ('NVIDIA Corporation', 'NVIDIA'),
+    ('Microsoft Research', 'Microsoft'),
+    ('Google Cloud', 'Google'),
+])
+def test_resolve_company_known(name, canonical):
+    assert bld.resolve_company(name)[0] == canonical
+
+
+@pytest.mark.parametrize('name', [
+    'Meta Materials',
+    'Apple Hospitality REIT',
+    'Alphabet Energy',
+    'Teslar',
+    'Teslas',
+    'Soft Bank',
+])
+def test_resolve_company_unrelated(name):
+    assert bld.resolve_company(name) == (name, 0.0, 'none')
+    assert bld.norm_company(name) == name
+
+
+def _resolve_techson(monkeypatch, table_path, manual):
+    monkeypatch.setattr(bld, 'build_techson_product_set', lambda techson: dict(manual))
+    table = bld.MatchTable(str(table_path))
+    resolver = bld.ProductResolver(bld.ScoreMatrix(), {}, table)
+    linked = resolver.resolve('Google', 'Circle to Search').techson
+    return linked, table.save()
+
+
+def test_manual_matches_apply_on_every_build(monkeypatch, tmp_path):
+    table_path = tmp_path / 'product_matches.json'
+    link = {('Google', 'Circle to Search'): 'Google Lens'}
+    assert _resolve_techson(monkeypatch, table_path, {}) == (False, True)
+    assert _resolve_techson(monkeypatch, table_path, link) == (True, True)
+    assert _resolve_techson(monkeypatch, table_path, link) == (True, False)
+    assert _resolve_techson(monkeypatch, table_path, {}) == (False, True)
+
+
+def _resolve_patlytics(monkeypatch, table_path, catalogue):
+    lookup = {('Google', prod): {'best_score': score} for prod, score in catalogue.items()}
+    monkeypatch.setattr(bld, 'build_product_patlytics_lookup',
+                        lambda patlytics: bld.ProductNameIndex(lookup))
+    table = bld.MatchTable(str(table_path) if table_path else None)
+    match = bld.ProductResolver(bld.ScoreMatrix(), {}, table).resolve('Google', 'Lens').pl_match
+    table.save()
+    return match.product, match.method
+
+
+def test_catalogue_change_matches_again(monkeypatch, tmp_path):
+    table_path = tmp_path / 'product_matches.json'
+    before = {'Lens Vision Kit': 0.9}
+    after = {'Lens Vision Kit': 0.9, 'Lens': 0.99}
+    assert _resolve_patlytics(monkeypatch, table_path, before) == ('Lens Vision Kit', 'substring')
+    fresh = _resolve_patlytics(monkeypatch, None, after)
+    assert fresh == ('Lens', 'exact')
+    assert _resolve_patlytics(monkeypatch, table_path, after) == fresh
+
+
+def test_review_report_follows_table(tmp_path):
+    table_path, review_path = tmp_path / 'product_matches.json', tmp_path / 'review.csv'
+    table = bld.MatchTable(str(table_path))
+    table.record('techson', 'Google', 'Lens', 'Google Lens', 'words', 0.7, 'suggested')
+    table.save(str(review_path))
+    assert 'Google Lens' in review_path.read_text()
+    table = bld.MatchTable(str(table_path))
+    table.get('techson', 'Google', 'Lens')['status'] = 'rejected'
+    table.save(str(review_path))
+    assert not review_path.exists()